@@ -1,24 +1,52 @@
-from openai import OpenAI
-import requests
+from openai import AsyncOpenAI
+import asyncio
+import concurrent.futures
+import contextvars
+import importlib.util
+import httpx
 import time
 from io import BytesIO
 import os
 import shutil
-from flask import Flask, request, Response, session, render_template, redirect, url_for, flash, jsonify
-from tempfile import NamedTemporaryFile
+from flask import Flask, request, Response, render_template, redirect, url_for, flash, jsonify
 import traceback
+from abc import ABC, abstractmethod
 from contextlib import contextmanager
 import json
-from datetime import datetime
+import difflib
+import hashlib
+import re
+import sqlite3
+import atexit
+import threading
+import queue
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta, timezone
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload
 from werkzeug.security import generate_password_hash, check_password_hash
-from functools import wraps
+from functools import wraps, lru_cache
 from dotenv import load_dotenv
+from google.auth.credentials import AnonymousCredentials
+from google.auth.transport.requests import Request as GoogleAuthRequest
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from googleapiclient import discovery_cache
+from googleapiclient.discovery import build_from_document
 from googleapiclient.errors import HttpError
 
+try:
+    import redis
+except ImportError:  # only needed when CONVERSATION_STORE_URL points at Redis
+    redis = None
+
+try:
+    import tiktoken
+except ImportError:  # token counts fall back to a characters/4 estimate
+    tiktoken = None
+
 # Load environment variables
 load_dotenv()
 
@@ -41,11 +69,132 @@ login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
 
-client = OpenAI(api_key=api_key)
-
 # Conversation storage configuration
 CONVERSATION_STORAGE_DIR = "conversations"
 os.makedirs(CONVERSATION_STORAGE_DIR, exist_ok=True)
+# Turns are appended to a per-call JSON Lines journal; fsync is batched across calls:
+# every JOURNAL_FSYNC_EVERY turns, and by a background thread every JOURNAL_FSYNC_INTERVAL.
+JOURNAL_FSYNC_EVERY = int(os.getenv('JOURNAL_FSYNC_EVERY', 16))
+JOURNAL_FSYNC_INTERVAL = float(os.getenv('JOURNAL_FSYNC_INTERVAL', 1.0))
+JOURNAL_MAX_OPEN_FILES = 128
+# Journals are compacted when the call ends (/call-status, or the closing line). The same
+# thread also compacts any journal untouched for JOURNAL_IDLE_COMPACT_AFTER seconds, for
+# calls whose end was never reported; it looks for them every JOURNAL_SWEEP_INTERVAL.
+JOURNAL_IDLE_COMPACT_AFTER = float(os.getenv('JOURNAL_IDLE_COMPACT_AFTER', 2 * 60 * 60))
+JOURNAL_SWEEP_INTERVAL = float(os.getenv('JOURNAL_SWEEP_INTERVAL', 5 * 60))
+# SQLite index mapping call_sid -> latest conversation file, so lookups never list the directory.
+CONVERSATION_INDEX_PATH = os.getenv('CONVERSATION_INDEX_PATH', os.path.join(CONVERSATION_STORAGE_DIR, "index.sqlite3"))
+
+# Conversation state store configuration
+# Unset keeps call state in this process; a redis:// URL shares it between workers.
+CONVERSATION_STORE_URL = os.getenv('CONVERSATION_STORE_URL')
+CONVERSATION_TTL = int(os.getenv('CONVERSATION_TTL', 2 * 60 * 60))
+CONVERSATION_STORE_MAX_CALLS = int(os.getenv('CONVERSATION_STORE_MAX_CALLS', 10000))
+
+# Streaming replies: speak the first sentence of the reply while the rest is still being
+# generated, then <Redirect> to /continue-response for the remainder. The remainder is
+# held by the worker process that started the stream, so Twilio's redirect must reach
+# the same process (single worker process, or sticky routing by CallSid).
+STREAM_RESPONSES = os.getenv('STREAM_RESPONSES', 'false').lower() == 'true'
+FIRST_SENTENCE_MIN_CHARS = int(os.getenv('FIRST_SENTENCE_MIN_CHARS', 12))
+# A remainder Twilio never redirects for (caller hung up) is cancelled after this long.
+REPLY_CONTINUATION_TTL = float(os.getenv('REPLY_CONTINUATION_TTL', 5 * 60))
+
+# Conversation context window: the prompt carries a running summary of older turns plus
+# the most recent turns verbatim, trimmed to CONTEXT_TOKEN_BUDGET. Older turns are folded
+# into the summary in batches, in the background, once more than CONTEXT_RECENT_TURNS
+# + CONTEXT_SUMMARY_BATCH turns are outside it.
+CONTEXT_RECENT_TURNS = int(os.getenv('CONTEXT_RECENT_TURNS', 6))
+CONTEXT_SUMMARY_BATCH = int(os.getenv('CONTEXT_SUMMARY_BATCH', 4))
+CONTEXT_TOKEN_BUDGET = int(os.getenv('CONTEXT_TOKEN_BUDGET', 1500))
+CONTEXT_SUMMARY_MAX_TOKENS = int(os.getenv('CONTEXT_SUMMARY_MAX_TOKENS', 200))
+SUMMARY_MODEL = os.getenv('SUMMARY_MODEL', 'gpt-3.5-turbo')
+
+# Optional cache of LLM replies keyed by the normalized prompt; 0 disables it.
+REPLY_CACHE_SIZE = int(os.getenv('REPLY_CACHE_SIZE', 0))
+
+# Speculative replies: right after asking a question, predict the caller's likely answers
+# and our reply to each; if the real transcript matches a prediction, that reply is used
+# and the chat completion is skipped.
+SPECULATIVE_MODE = os.getenv('SPECULATIVE_MODE', 'false').lower() == 'true'
+SPECULATION_CANDIDATES = int(os.getenv('SPECULATION_CANDIDATES', 3))
+SPECULATION_MATCH_THRESHOLD = float(os.getenv('SPECULATION_MATCH_THRESHOLD', 0.8))
+
+# HTTP connection pools
+# Every turn in a worker process runs on one event loop, so each pool is sized to the
+# number of request threads per worker (gunicorn --threads). Connections are kept alive
+# between turns and use HTTP/2 when the h2 package is installed and the host offers it.
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', os.getenv('GUNICORN_THREADS', 64)))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY', 90))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').lower() == 'true' and importlib.util.find_spec('h2') is not None
+
+# Async call-turn engine configuration
+# Twilio gives up on a webhook after 15 seconds, so a webhook never waits longer than this.
+TURN_TIMEOUT = float(os.getenv('TURN_TIMEOUT', 14))
+
+# Turn job queue: /handle-response queues the turn and waits up to TURN_RESULT_WAIT for it;
+# slower turns keep running while Twilio loops on <Pause>/<Redirect> to /turn-result.
+TURN_QUEUE_WORKERS = int(os.getenv('TURN_QUEUE_WORKERS', 32))
+TURN_QUEUE_MAX_DEPTH = int(os.getenv('TURN_QUEUE_MAX_DEPTH', 64))
+TURN_RESULT_WAIT = float(os.getenv('TURN_RESULT_WAIT', 10))
+TURN_JOB_TIMEOUT = float(os.getenv('TURN_JOB_TIMEOUT', 60))
+TURN_POLL_PAUSE = int(os.getenv('TURN_POLL_PAUSE', 1))
+# Finished results nobody picked up (e.g. the caller hung up) are dropped after this long.
+TURN_RESULT_TTL = 300
+
+# Recording fetch configuration
+# Twilio usually has the recording ready within a second of the <Record> action,
+# so we poll with a short, capped backoff and wake up early on recordingStatusCallback.
+RECORDING_READY_TIMEOUT = float(os.getenv('RECORDING_READY_TIMEOUT', 20))
+RECORDING_POLL_INITIAL_DELAY = float(os.getenv('RECORDING_POLL_INITIAL_DELAY', 0.1))
+RECORDING_POLL_MAX_DELAY = float(os.getenv('RECORDING_POLL_MAX_DELAY', 0.8))
+# Recordings are capped at maxLength="10", i.e. well under 1MB of MP3; Whisper itself rejects >25MB.
+MAX_RECORDING_BYTES = int(os.getenv('MAX_RECORDING_BYTES', 5 * 1024 * 1024))
+RECORDING_CHUNK_SIZE = 64 * 1024
+
+# Metrics configuration
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0)
+METRICS_RECENT_TURNS = int(os.getenv('METRICS_RECENT_TURNS', 200))
+# Per-stage latency SLOs in seconds, e.g. "transcribe=2,llm=3,turn=8"
+STAGE_SLOS = {
+    stage.strip(): float(limit)
+    for stage, _, limit in (item.partition('=') for item in os.getenv('STAGE_SLOS', '').split(',') if '=' in item)
+}
+
+# Google API configuration
+GOOGLE_SCOPES = [
+    'https://www.googleapis.com/auth/drive.readonly',
+    'https://www.googleapis.com/auth/spreadsheets.readonly',
+]
+# Refresh the service-account token this long before it expires, so no request pays for it.
+GOOGLE_TOKEN_REFRESH_MARGIN = float(os.getenv('GOOGLE_TOKEN_REFRESH_MARGIN', 300))
+# Override the Drive/Sheets API roots, e.g. to point at a local stub server. With no
+# GOOGLE_APPLICATION_CREDENTIALS set, requests to them are sent unauthenticated.
+DRIVE_API_ENDPOINT = os.getenv('DRIVE_API_ENDPOINT')
+SHEETS_API_ENDPOINT = os.getenv('SHEETS_API_ENDPOINT')
+# Sheet search serves a local index of the survey spreadsheets, built by paging through
+# files.list once and then kept current from the Drive changes feed. The index and its
+# change token are saved to SHEET_INDEX_PATH, so a restart resumes from the token.
+SHEET_SEARCH_QUERY = "name contains '(Survey) (Responses)' and mimeType='application/vnd.google-apps.spreadsheet'"
+SHEET_INDEX_PATH = os.getenv('SHEET_INDEX_PATH', 'sheet_index.json')
+SHEET_INDEX_SYNC_INTERVAL = float(os.getenv('SHEET_INDEX_SYNC_INTERVAL', 30))
+DRIVE_PAGE_SIZE = 1000
+# Rendered /api/sheet-search responses are reused for SHEET_SEARCH_CACHE_TTL seconds. For
+# a further SHEET_SEARCH_STALE_TTL the old response is still served while it is
+# re-rendered in the background; after that, the next request renders it inline.
+SHEET_SEARCH_CACHE_TTL = float(os.getenv('SHEET_SEARCH_CACHE_TTL', 30))
+SHEET_SEARCH_STALE_TTL = float(os.getenv('SHEET_SEARCH_STALE_TTL', 300))
+SHEET_SEARCH_CACHE_SIZE = 64
+# Survey response rows are copied from every indexed spreadsheet into a local SQLite
+# store; a sync re-reads only spreadsheets whose modifiedTime changed since the last one.
+# The range is read from each spreadsheet's first sheet, header row first.
+SURVEY_STORE_PATH = os.getenv('SURVEY_STORE_PATH', 'survey_responses.sqlite3')
+SURVEY_RESPONSE_RANGE = os.getenv('SURVEY_RESPONSE_RANGE', 'A1:ZZ')
+SURVEY_INGEST_CONCURRENCY = int(os.getenv('SURVEY_INGEST_CONCURRENCY', 4))
+
+# Logged-in users are cached with their role for this long between requests; the admin
+# routes that change a user drop its entry straight away. 0 disables the cache.
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 30))
 
 # TTS Configuration
 TTS_CONFIG = {
@@ -63,6 +212,38 @@ class Role(db.Model):
     description = db.Column(db.String(200))
     permissions = db.Column(db.String(500))  # JSON string of permissions
 
+# Compiled role access, keyed by role id: permission checks read the user's role_id
+# column and this cache, so they never load the role or split its permission string.
+# Entries are dropped whenever a Role row is written (dict get/set/pop are atomic).
+class RoleAccess:
+    __slots__ = ('name', 'permissions')
+
+    def __init__(self, name, permissions):
+        self.name = name
+        self.permissions = permissions
+
+_role_access = {}
+
+def role_access(role_id):
+    """The RoleAccess for role_id (None for an unknown role); queries only on a cache miss."""
+    access = _role_access.get(role_id)
+    if access is None and role_id is not None:
+        role = db.session.get(Role, role_id)
+        if role is None:
+            return None
+        access = RoleAccess(
+            role.name,
+            frozenset(p.strip() for p in (role.permissions or '').split(',') if p.strip())
+        )
+        _role_access[role_id] = access
+    return access
+
+@event.listens_for(Role, 'after_insert')
+@event.listens_for(Role, 'after_update')
+@event.listens_for(Role, 'after_delete')
+def _invalidate_role_access(mapper, connection, role):
+    _role_access.pop(role.id, None)
+
 # User model
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -79,21 +260,60 @@ class User(UserMixin, db.Model):
         return check_password_hash(self.password_hash, password)
 
     def has_permission(self, permission):
-        if not self.role:
-            return False
-        permissions = self.role.permissions.split(',')
-        return permission in permissions
+        access = role_access(self.role_id)
+        return access is not None and permission in access.permissions
+
+# Identity cache
+# load_user runs on every authenticated request. Cached users are loaded together with
+# their role in one query and detached from the session, so any request thread can use
+# them without a lazy load.
+class IdentityCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._users = {}
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires <= time.monotonic():
+                del self._users[user_id]
+                return None
+            return user
+
+    def put(self, user):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._users[user.id] = (user, time.monotonic() + self.ttl)
+
+    def forget(self, user_id):
+        with self._lock:
+            self._users.pop(int(user_id), None)
+
+identity_cache = IdentityCache(USER_CACHE_TTL)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    user_id = int(user_id)
+    user = identity_cache.get(user_id)
+    if user is None:
+        user = User.query.options(joinedload(User.role)).filter_by(id=user_id).first()
+        if user is not None:
+            db.session.expunge(user)
+            identity_cache.put(user)
+    return user
 
 # Custom decorator for role-based access control
 def role_required(role_name):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if not current_user.is_authenticated or current_user.role.name != role_name:
+            access = role_access(current_user.role_id) if current_user.is_authenticated else None
+            if access is None or access.name != role_name:
                 flash('You do not have permission to access this page.', 'error')
                 return redirect(url_for('dashboard'))
             return f(*args, **kwargs)
@@ -134,99 +354,1943 @@ with app.app_context():
     
     db.session.commit()
 
+# Metrics
+# Minimal Prometheus-style metrics, kept per worker process and served on /metrics.
+# Call pipeline stages are timed with stage_timer; the call and turn being timed
+# come from _turn_context, which run_call_turn sets for its task.
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in sorted(labels.items())) + '}'
+
+class Counter:
+    type = 'counter'
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, dict(key), value) for key, value in self._values.items()]
+
+class Histogram:
+    type = 'histogram'
+
+    def __init__(self, name, help_text, buckets=LATENCY_BUCKETS, window=1000):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.window = window
+        self._lock = threading.Lock()
+        self._series = {}  # label key -> {'buckets', 'sum', 'count', 'recent'}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {
+                    'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0,
+                    'recent': deque(maxlen=self.window)
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['buckets'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+            series['recent'].append(value)
+
+    def samples(self):
+        result = []
+        with self._lock:
+            for key, series in self._series.items():
+                labels = dict(key)
+                for bound, count in zip(self.buckets, series['buckets']):
+                    result.append((f"{self.name}_bucket", dict(labels, le=str(bound)), count))
+                result.append((f"{self.name}_bucket", dict(labels, le="+Inf"), series['count']))
+                result.append((f"{self.name}_sum", labels, series['sum']))
+                result.append((f"{self.name}_count", labels, series['count']))
+        return result
+
+    def mean(self, **labels):
+        with self._lock:
+            series = self._series.get(tuple(sorted(labels.items())))
+            return series['sum'] / series['count'] if series and series['count'] else None
+
+    def summary(self, label):
+        """Count, mean and quantiles over the recent window, keyed by one label's value."""
+        result = {}
+        with self._lock:
+            for key, series in self._series.items():
+                recent = sorted(series['recent'])
+                if not recent:
+                    continue
+                pick = lambda q: recent[min(len(recent) - 1, int(q * len(recent)))]
+                result[dict(key).get(label)] = {
+                    'count': series['count'],
+                    'mean': series['sum'] / series['count'],
+                    'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99), 'max': recent[-1]
+                }
+        return result
+
+class CallbackMetric:
+    """A counter or gauge whose value is read from `fn` at scrape time."""
+
+    def __init__(self, name, help_text, metric_type, fn):
+        self.name = name
+        self.help = help_text
+        self.type = metric_type
+        self._fn = fn
+
+    def samples(self):
+        return [(self.name, {}, self._fn())]
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+class TurnTimings:
+    """Stage timings of the most recent call turns, for the JSON summary."""
+
+    def __init__(self, max_turns=METRICS_RECENT_TURNS):
+        self.max_turns = max_turns
+        self._lock = threading.Lock()
+        self._turns = OrderedDict()  # (call_sid, turn) -> {stage: seconds}
+
+    def record(self, call_sid, turn, stage, seconds):
+        with self._lock:
+            stages = self._turns.setdefault((call_sid, turn), {})
+            stages[stage] = stages.get(stage, 0.0) + seconds
+            while len(self._turns) > self.max_turns:
+                self._turns.popitem(last=False)
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                {'call_sid': call_sid, 'turn': turn, 'stages': dict(stages)}
+                for (call_sid, turn), stages in self._turns.items()
+            ]
+
+metrics_registry = MetricsRegistry()
+STAGE_LATENCY = metrics_registry.register(
+    Histogram('call_stage_seconds', 'Latency of each call pipeline stage.')
+)
+SLO_BREACHES = metrics_registry.register(
+    Counter('call_stage_slo_breaches_total', 'Stage executions slower than their STAGE_SLOS limit.')
+)
+turn_timings = TurnTimings()
+_turn_context = contextvars.ContextVar('turn_context', default=(None, None))
+
+def observe_stage(stage, seconds, call_sid=None, turn=None):
+    if call_sid is None:
+        call_sid, turn = _turn_context.get()
+    STAGE_LATENCY.observe(seconds, stage=stage)
+    if stage in STAGE_SLOS and seconds > STAGE_SLOS[stage]:
+        SLO_BREACHES.inc(stage=stage)
+    if call_sid is not None:
+        turn_timings.record(call_sid, turn, stage, seconds)
+
+@contextmanager
+def stage_timer(stage, call_sid=None, turn=None):
+    """Time the enclosed block as one call pipeline stage."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - started, call_sid, turn)
+
+# HTTP clients
+# Twilio recordings and OpenAI each get their own long-lived client, i.e. their own
+# keep-alive pool. The transport counts requests, new TCP connections and TLS
+# handshakes per pool, so connection reuse is visible on /metrics.
+HTTP_REQUESTS = metrics_registry.register(
+    Counter('http_client_requests_total', 'Outgoing HTTP requests per connection pool.')
+)
+HTTP_CONNECTIONS = metrics_registry.register(
+    Counter('http_client_connections_opened_total', 'New TCP connections opened per connection pool.')
+)
+HTTP_TLS_HANDSHAKES = metrics_registry.register(
+    Counter('http_client_tls_handshakes_total', 'TLS handshakes performed per connection pool.')
+)
+
+class InstrumentedTransport(httpx.AsyncHTTPTransport):
+    def __init__(self, pool_name, **kwargs):
+        super().__init__(**kwargs)
+        self.pool_name = pool_name
+
+    async def _trace(self, event_name, info):
+        if event_name == 'connection.connect_tcp.complete':
+            HTTP_CONNECTIONS.inc(pool=self.pool_name)
+        elif event_name == 'connection.start_tls.complete':
+            HTTP_TLS_HANDSHAKES.inc(pool=self.pool_name)
+
+    async def handle_async_request(self, request):
+        HTTP_REQUESTS.inc(pool=self.pool_name)
+        request.extensions['trace'] = self._trace
+        return await super().handle_async_request(request)
+
+def build_http_client(pool_name, **kwargs):
+    transport = InstrumentedTransport(
+        pool_name,
+        http2=HTTP2_ENABLED,
+        limits=httpx.Limits(
+            max_connections=HTTP_POOL_SIZE,
+            max_keepalive_connections=HTTP_POOL_SIZE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY
+        )
+    )
+    return httpx.AsyncClient(transport=transport, **kwargs)
+
+def http_pool_stats():
+    """Requests, new connections and reuse ratio for each pool."""
+    requests_by_pool = {labels['pool']: value for _, labels, value in HTTP_REQUESTS.samples()}
+    connections = {labels['pool']: value for _, labels, value in HTTP_CONNECTIONS.samples()}
+    handshakes = {labels['pool']: value for _, labels, value in HTTP_TLS_HANDSHAKES.samples()}
+    return {
+        pool: {
+            'requests': count,
+            'connections_opened': connections.get(pool, 0),
+            'tls_handshakes': handshakes.get(pool, 0),
+            'reuse_ratio': 1 - connections.get(pool, 0) / count if count else None
+        }
+        for pool, count in requests_by_pool.items()
+    }
+
+# Call turns run on a per-process event loop (see run_async), so both clients are async.
+recording_http = build_http_client(
+    'twilio',
+    timeout=15,
+    follow_redirects=True  # Twilio redirects recording media to its storage bucket
+)
+client = AsyncOpenAI(api_key=api_key, http_client=build_http_client('openai', timeout=60))
+
+# Async call-turn engine
+# Each worker process runs a single event loop in a background thread. Request threads
+# hand their call turn to it and wait, so one gthread worker keeps many calls in flight
+# while recordings download and OpenAI requests are outstanding.
+_turn_loop = None
+_turn_loop_lock = threading.Lock()
+
+def get_turn_loop():
+    """Return this process's turn loop, starting it on first use (i.e. after the gunicorn fork)."""
+    global _turn_loop
+    with _turn_loop_lock:
+        if _turn_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="call-turn-loop", daemon=True).start()
+            _turn_loop = loop
+        return _turn_loop
+
+def run_async(coro, timeout=None):
+    """Run a coroutine on the turn loop from a request thread and wait for its result."""
+    future = asyncio.run_coroutine_threadsafe(coro, get_turn_loop())
+    try:
+        return future.result(timeout)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+# Conversation state store
+# Live call state is kept server-side, keyed by CallSid, instead of in the Flask
+# session cookie. Each call is a handful of profile fields plus an append-only
+# list of caller lines, so a turn only writes the fields and lines it changed.
+CONVERSATION_FIELDS = ('first_name', 'preferred_name', 'conversation_complete', 'summary', 'summarized_turns')
+
+class ConversationStore(ABC):
+    """Interface for call state storage; implementations expire calls after `ttl` seconds."""
+
+    @abstractmethod
+    def get(self, call_sid):
+        """Return {'call_sid', 'conversation_log', *CONVERSATION_FIELDS} or None."""
+
+    @abstractmethod
+    def start(self, call_sid, conversation_log=(), **fields):
+        """Create (or reset) the state for a call."""
+
+    @abstractmethod
+    def update(self, call_sid, **fields):
+        """Set profile fields on a call."""
+
+    @abstractmethod
+    def append(self, call_sid, *lines):
+        """Append caller lines to a call's conversation log."""
+
+    def save_delta(self, before, after):
+        """Persist what a turn changed between two state snapshots."""
+        call_sid = after['call_sid']
+        new_lines = after['conversation_log'][len(before['conversation_log']):]
+        if new_lines:
+            self.append(call_sid, *new_lines)
+        changed = {k: after[k] for k in CONVERSATION_FIELDS if after.get(k) != before.get(k)}
+        if changed:
+            self.update(call_sid, **changed)
+
+def new_conversation_state(call_sid, conversation_log=(), **fields):
+    state = {'call_sid': call_sid, 'conversation_log': list(conversation_log),
+             'first_name': "", 'preferred_name': None, 'conversation_complete': False,
+             'summary': "", 'summarized_turns': 0}
+    state.update(fields)
+    return state
+
+class InMemoryConversationStore(ConversationStore):
+    """Process-local LRU store with per-call TTL."""
+
+    def __init__(self, ttl=CONVERSATION_TTL, max_entries=CONVERSATION_STORE_MAX_CALLS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._calls = OrderedDict()  # call_sid -> (expires_at, state)
+
+    def _live(self, call_sid):
+        entry = self._calls.get(call_sid)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._calls[call_sid]
+            return None
+        self._calls[call_sid] = (time.monotonic() + self.ttl, entry[1])
+        self._calls.move_to_end(call_sid)
+        return entry[1]
+
+    def get(self, call_sid):
+        with self._lock:
+            state = self._live(call_sid)
+            if state is None:
+                return None
+            return dict(state, conversation_log=list(state['conversation_log']))
+
+    def start(self, call_sid, conversation_log=(), **fields):
+        with self._lock:
+            self._calls[call_sid] = (time.monotonic() + self.ttl,
+                                     new_conversation_state(call_sid, conversation_log, **fields))
+            self._calls.move_to_end(call_sid)
+            while len(self._calls) > self.max_entries:
+                self._calls.popitem(last=False)
+
+    def update(self, call_sid, **fields):
+        with self._lock:
+            state = self._live(call_sid)
+            if state is not None:
+                state.update(fields)
+
+    def append(self, call_sid, *lines):
+        with self._lock:
+            state = self._live(call_sid)
+            if state is not None:
+                state['conversation_log'].extend(lines)
+
+class RedisConversationStore(ConversationStore):
+    """Redis-backed store: a hash of profile fields plus a list of caller lines per call."""
+
+    def __init__(self, url, ttl=CONVERSATION_TTL):
+        if redis is None:
+            raise RuntimeError("CONVERSATION_STORE_URL is set but the redis package is not installed.")
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    @staticmethod
+    def _keys(call_sid):
+        return f"conversation:{call_sid}", f"conversation:{call_sid}:log"
+
+    def get(self, call_sid):
+        fields_key, log_key = self._keys(call_sid)
+        pipe = self._redis.pipeline()
+        pipe.hgetall(fields_key)
+        pipe.lrange(log_key, 0, -1)
+        pipe.expire(fields_key, self.ttl)
+        pipe.expire(log_key, self.ttl)
+        fields, conversation_log, _, _ = pipe.execute()
+        if not fields:
+            return None
+        return new_conversation_state(
+            call_sid, conversation_log, **{k: json.loads(v) for k, v in fields.items()}
+        )
+
+    def start(self, call_sid, conversation_log=(), **fields):
+        fields_key, log_key = self._keys(call_sid)
+        state = new_conversation_state(call_sid, **fields)
+        pipe = self._redis.pipeline()
+        pipe.delete(fields_key, log_key)
+        pipe.hset(fields_key, mapping={k: json.dumps(state[k]) for k in CONVERSATION_FIELDS})
+        if conversation_log:
+            pipe.rpush(log_key, *conversation_log)
+        pipe.expire(fields_key, self.ttl)
+        pipe.expire(log_key, self.ttl)
+        pipe.execute()
+
+    def update(self, call_sid, **fields):
+        fields_key, _ = self._keys(call_sid)
+        pipe = self._redis.pipeline()
+        pipe.hset(fields_key, mapping={k: json.dumps(v) for k, v in fields.items()})
+        pipe.expire(fields_key, self.ttl)
+        pipe.execute()
+
+    def append(self, call_sid, *lines):
+        _, log_key = self._keys(call_sid)
+        pipe = self._redis.pipeline()
+        pipe.rpush(log_key, *lines)
+        pipe.expire(log_key, self.ttl)
+        pipe.execute()
+
+def create_conversation_store():
+    if CONVERSATION_STORE_URL:
+        return RedisConversationStore(CONVERSATION_STORE_URL)
+    return InMemoryConversationStore()
+
+conversation_store = create_conversation_store()
+
+# Conversation journal
+# Each call has one append-only {call_sid}.jsonl file holding one compact JSON line
+# per turn (just that turn's caller line and names). When a call finishes it is
+# compacted into a single {call_sid}.json record and the journal is removed.
+class ConversationJournal:
+    def __init__(self, directory, fsync_every=JOURNAL_FSYNC_EVERY,
+                 fsync_interval=JOURNAL_FSYNC_INTERVAL, max_open_files=JOURNAL_MAX_OPEN_FILES):
+        self.directory = directory
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.max_open_files = max_open_files
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # call_sid -> open append handle
+        self._dirty = set()
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    def journal_path(self, call_sid):
+        return os.path.join(self.directory, f"{call_sid}.jsonl")
+
+    def record_path(self, call_sid):
+        return os.path.join(self.directory, f"{call_sid}.json")
+
+    def _handle(self, call_sid):
+        f = self._files.get(call_sid)
+        if f is None:
+            f = self._files[call_sid] = open(self.journal_path(call_sid), 'a', encoding='utf-8')
+            while len(self._files) > self.max_open_files:
+                old_sid, old = self._files.popitem(last=False)
+                self._close(old_sid, old)
+        else:
+            self._files.move_to_end(call_sid)
+        return f
+
+    def _close(self, call_sid, f):
+        if call_sid in self._dirty:
+            f.flush()
+            os.fsync(f.fileno())
+            self._dirty.discard(call_sid)
+        f.close()
+
+    def _fsync_dirty(self):
+        for call_sid in self._dirty:
+            os.fsync(self._files[call_sid].fileno())
+        self._dirty.clear()
+        self._pending = 0
+        self._last_fsync = time.monotonic()
+
+    def append(self, call_sid, entry):
+        """Append one turn; data is fsynced every `fsync_every` turns or `fsync_interval` seconds."""
+        line = json.dumps(entry, separators=(',', ':')) + "\n"
+        with self._lock:
+            f = self._handle(call_sid)
+            f.write(line)
+            f.flush()
+            self._dirty.add(call_sid)
+            self._pending += 1
+            if (self._pending >= self.fsync_every
+                    or time.monotonic() - self._last_fsync >= self.fsync_interval):
+                self._fsync_dirty()
+
+    def flush(self):
+        with self._lock:
+            if self._dirty:
+                self._fsync_dirty()
+
+    def idle_journals(self, idle_for):
+        """call_sids of journals not appended to for at least `idle_for` seconds."""
+        cutoff = time.time() - idle_for
+        idle = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".jsonl") and entry.stat().st_mtime < cutoff:
+                    idle.append(entry.name[:-len(".jsonl")])
+        return idle
+
+    def close(self):
+        with self._lock:
+            while self._files:
+                self._close(*self._files.popitem(last=False))
+
+    @staticmethod
+    def fold(record, entries):
+        """Apply journal entries on top of a (possibly empty) compacted record."""
+        record = dict(record or {})
+        record.setdefault('conversation_log', [])
+        for entry in entries:
+            record['call_sid'] = entry.get('call_sid', record.get('call_sid'))
+            if entry.get('line') is not None:
+                record['conversation_log'].append(entry['line'])
+            for key in ('first_name', 'preferred_name', 'conversation_complete'):
+                if entry.get(key) is not None:
+                    record[key] = entry[key]
+            record['timestamp'] = entry.get('timestamp', record.get('timestamp'))
+        return record
+
+    def _read_entries(self, call_sid):
+        try:
+            with open(self.journal_path(call_sid), 'r', encoding='utf-8') as f:
+                # A torn last line (crash mid-append) is skipped rather than failing the load.
+                entries = []
+                for raw in f:
+                    try:
+                        entries.append(json.loads(raw))
+                    except ValueError:
+                        continue
+                return entries
+        except FileNotFoundError:
+            return None
+
+    def _read_record(self, call_sid):
+        try:
+            with open(self.record_path(call_sid), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def load(self, call_sid):
+        with self._lock:
+            f = self._files.get(call_sid)
+            if f is not None:
+                f.flush()
+            record = self._read_record(call_sid)
+            entries = self._read_entries(call_sid)
+        if record is None and entries is None:
+            return None
+        return self.fold(record, entries or [])
+
+    def compact(self, call_sid):
+        """Fold a finished call's journal into its single {call_sid}.json record.
+
+        Returns False if there was no journal (already compacted, or no turns).
+        """
+        with self._lock:
+            f = self._files.pop(call_sid, None)
+            if f is not None:
+                self._close(call_sid, f)
+            entries = self._read_entries(call_sid)
+            if entries is None:
+                return False
+            record = self.fold(self._read_record(call_sid), entries)
+            tmp_path = f"{self.record_path(call_sid)}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as out:
+                json.dump(record, out, separators=(',', ':'))
+                out.flush()
+                os.fsync(out.fileno())
+            os.replace(tmp_path, self.record_path(call_sid))
+            try:
+                os.unlink(self.journal_path(call_sid))
+            except FileNotFoundError:
+                pass  # another worker process compacted it concurrently
+            return True
+
+conversation_journal = ConversationJournal(CONVERSATION_STORAGE_DIR)
+atexit.register(conversation_journal.close)
+
+# Conversation index
+# Maps call_sid to the file holding its latest record: the journal, the compacted
+# record, or (for calls stored before the journal) the newest legacy snapshot.
+# The index is brought up to date on startup by scanning only files modified
+# since the previous scan, and save_conversation/finish_conversation keep it current.
+LEGACY_SNAPSHOT_RE = re.compile(r'^(?P<call_sid>.+)_\d{8}_\d{6}\.json$')
+
+class ConversationIndex:
+    def __init__(self, directory, path=CONVERSATION_INDEX_PATH, memo_size=4096):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS conversation_index ("
+            "call_sid TEXT PRIMARY KEY, filename TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS index_meta (key TEXT PRIMARY KEY, value TEXT)")
+        # Recently recorded locations, so repeat appends to a journal skip the write.
+        self._memo = OrderedDict()
+        self._memo_size = memo_size
+
+    @staticmethod
+    def _classify(filename):
+        """Return (call_sid, is_legacy) for a conversation file, or None for anything else."""
+        if filename.endswith(".jsonl"):
+            return filename[:-len(".jsonl")], False
+        match = LEGACY_SNAPSHOT_RE.match(filename)
+        if match:
+            return match.group('call_sid'), True
+        if filename.endswith(".json"):
+            return filename[:-len(".json")], False
+        return None
+
+    def lookup(self, call_sid):
+        """Return the path of the call's latest record, or None if the call is unknown."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT filename FROM conversation_index WHERE call_sid = ?", (call_sid,)
+            ).fetchone()
+        return os.path.join(self.directory, row[0]) if row else None
+
+    def record(self, call_sid, path):
+        filename = os.path.basename(path)
+        with self._lock:
+            if self._memo.get(call_sid) == filename:
+                self._memo.move_to_end(call_sid)
+                return
+            self._db.execute(
+                "INSERT INTO conversation_index (call_sid, filename, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(call_sid) DO UPDATE SET filename = excluded.filename, updated_at = excluded.updated_at",
+                (call_sid, filename, time.time())
+            )
+            self._memo[call_sid] = filename
+            while len(self._memo) > self._memo_size:
+                self._memo.popitem(last=False)
+
+    def sync(self):
+        """Index files modified since the last sync; returns the number of files examined."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM index_meta WHERE key = 'scanned_mtime'").fetchone()
+            since = float(row[0]) if row else 0.0
+            latest = {}
+            newest_mtime = since
+            for entry in os.scandir(self.directory):
+                classified = self._classify(entry.name)
+                if classified is None:
+                    continue
+                mtime = entry.stat().st_mtime
+                if mtime < since:
+                    continue
+                newest_mtime = max(newest_mtime, mtime)
+                call_sid, is_legacy = classified
+                current = latest.get(call_sid)
+                # Journal/compacted records win over legacy snapshots; among snapshots the newest name wins.
+                if current is None or (current[1] and (not is_legacy or entry.name > current[0])):
+                    latest[call_sid] = (entry.name, is_legacy, mtime)
+            self._db.execute("BEGIN")
+            for call_sid, (filename, is_legacy, mtime) in latest.items():
+                if is_legacy:
+                    existing = self._db.execute(
+                        "SELECT filename FROM conversation_index WHERE call_sid = ?", (call_sid,)
+                    ).fetchone()
+                    if existing and not (self._classify(existing[0])[1] and existing[0] < filename):
+                        continue
+                self._db.execute(
+                    "INSERT OR REPLACE INTO conversation_index (call_sid, filename, updated_at) VALUES (?, ?, ?)",
+                    (call_sid, filename, mtime)
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO index_meta (key, value) VALUES ('scanned_mtime', ?)", (str(newest_mtime),)
+            )
+            self._db.execute("COMMIT")
+            return len(latest)
+
+conversation_index = ConversationIndex(CONVERSATION_STORAGE_DIR)
+conversation_index.sync()
+
 # Helper functions for call agent
-def save_conversation(call_sid, conversation_data):
-    """Save conversation data to a file for future reference."""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"{CONVERSATION_STORAGE_DIR}/{call_sid}_{timestamp}.json"
-    with open(filename, 'w') as f:
-        json.dump(conversation_data, f, indent=2)
+def save_conversation(call_sid, turn_entry):
+    """Append one turn of conversation data to the call's journal."""
+    conversation_journal.append(call_sid, turn_entry)
+    conversation_index.record(call_sid, conversation_journal.journal_path(call_sid))
+
+def finish_conversation(call_sid):
+    """Compact a completed call into its single record."""
+    if conversation_journal.compact(call_sid):
+        conversation_index.record(call_sid, conversation_journal.record_path(call_sid))
+
+def _journal_maintenance():
+    """Background fsync of the journal, plus compaction of abandoned journals."""
+    next_sweep = time.monotonic() + JOURNAL_SWEEP_INTERVAL
+    while True:
+        time.sleep(JOURNAL_FSYNC_INTERVAL)
+        try:
+            conversation_journal.flush()
+            if time.monotonic() >= next_sweep:
+                next_sweep = time.monotonic() + JOURNAL_SWEEP_INTERVAL
+                for call_sid in conversation_journal.idle_journals(JOURNAL_IDLE_COMPACT_AFTER):
+                    finish_conversation(call_sid)
+        except Exception as e:
+            print("Journal maintenance failed:", e)
+
+threading.Thread(target=_journal_maintenance, name="journal-maintenance", daemon=True).start()
 
 def load_conversation(call_sid):
     """Load conversation data if it exists."""
     try:
-        files = [f for f in os.listdir(CONVERSATION_STORAGE_DIR) if f.startswith(call_sid)]
-        if not files:
+        path = conversation_index.lookup(call_sid)
+        if path is None:
             return None
-        latest_file = max(files)
-        with open(os.path.join(CONVERSATION_STORAGE_DIR, latest_file), 'r') as f:
-            return json.load(f)
+        if ConversationIndex._classify(os.path.basename(path))[1]:
+            with open(path, 'r') as f:
+                return json.load(f)
+        return conversation_journal.load(call_sid)
     except Exception:
         return None
 
-@contextmanager
-def safe_temp_file(suffix=None):
-    """Safely create and cleanup a temporary file."""
-    temp_file = NamedTemporaryFile(suffix=suffix, delete=False)
+class RecordingNotReady(Exception):
+    """Raised when a recording is still unavailable after RECORDING_READY_TIMEOUT."""
+
+class RecordingTooLarge(Exception):
+    """Raised when a recording exceeds MAX_RECORDING_BYTES."""
+
+class RecordingRegistry:
+    """Tracks recordings Twilio has reported as completed via recordingStatusCallback.
+
+    The events live on the turn loop; mark_ready is safe to call from request threads.
+    """
+
+    def __init__(self, max_entries=1024):
+        self._events = OrderedDict()
+        self._max_entries = max_entries
+
+    def _event(self, recording_sid):
+        event = self._events.get(recording_sid)
+        if event is None:
+            event = self._events[recording_sid] = asyncio.Event()
+            while len(self._events) > self._max_entries:
+                self._events.popitem(last=False)
+        return event
+
+    def _set(self, recording_sid):
+        self._event(recording_sid).set()
+
+    def mark_ready(self, recording_sid):
+        get_turn_loop().call_soon_threadsafe(self._set, recording_sid)
+
+    async def wait(self, recording_sid, timeout):
+        """Wait until the recording is reported ready or the timeout expires."""
+        try:
+            await asyncio.wait_for(self._event(recording_sid).wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def discard(self, recording_sid):
+        self._events.pop(recording_sid, None)
+
+recording_registry = RecordingRegistry()
+
+def recording_sid_from_url(recording_url):
+    """Twilio recording URLs end in /Recordings/<RecordingSid>, optionally with a .mp3/.wav suffix."""
+    return recording_url.rstrip('/').rsplit('/', 1)[-1].split('.', 1)[0]
+
+async def read_recording_body(response, name="recording.mp3"):
+    """Stream a recording response into an in-memory buffer ready for upload.
+
+    The body is read in chunks straight into a BytesIO (no temp file, no second
+    copy of the whole body) and rejected once it passes MAX_RECORDING_BYTES.
+    """
+    content_length = response.headers.get('Content-Length')
+    if content_length and int(content_length) > MAX_RECORDING_BYTES:
+        raise RecordingTooLarge(f"Recording is {content_length} bytes (limit {MAX_RECORDING_BYTES})")
+    buffer = BytesIO()
+    async for chunk in response.aiter_bytes(RECORDING_CHUNK_SIZE):
+        if buffer.tell() + len(chunk) > MAX_RECORDING_BYTES:
+            raise RecordingTooLarge(f"Recording exceeds {MAX_RECORDING_BYTES} bytes")
+        buffer.write(chunk)
+    buffer.seek(0)
+    buffer.name = name
+    return buffer
+
+async def fetch_recording(recording_url, recording_sid=None):
+    """Download a recording as soon as Twilio has it available.
+
+    The first request goes out immediately. While Twilio answers 404 (or a 5xx),
+    or the connection fails, we back off starting at RECORDING_POLL_INITIAL_DELAY,
+    doubling up to RECORDING_POLL_MAX_DELAY. The first wait after the
+    recordingStatusCallback for this recording arrives is cut short; if Twilio
+    still isn't serving it, later waits sleep the full backoff.
+
+    Returns a file-like BytesIO that can be handed directly to Whisper.
+    """
+    recording_sid = recording_sid or recording_sid_from_url(recording_url)
+    started = time.monotonic()
+    deadline = started + RECORDING_READY_TIMEOUT
+    delay = RECORDING_POLL_INITIAL_DELAY
+    callback_seen = False
     try:
-        yield temp_file
+        while True:
+            try:
+                async with recording_http.stream("GET", recording_url) as response:
+                    last_error = f"status {response.status_code}"
+                    if not (response.status_code == 404 or response.status_code >= 500):
+                        observe_stage('recording_wait', time.monotonic() - started)
+                        response.raise_for_status()
+                        with stage_timer('download'):
+                            return await read_recording_body(response)
+            except httpx.TransportError as e:
+                # Dropped connections and timeouts are retried within the same deadline.
+                last_error = f"{type(e).__name__}: {e}"
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise RecordingNotReady(
+                    f"Recording {recording_sid} not available after {RECORDING_READY_TIMEOUT}s "
+                    f"(last {last_error})"
+                )
+            if callback_seen:
+                await asyncio.sleep(min(delay, remaining))
+            else:
+                callback_seen = await recording_registry.wait(recording_sid, min(delay, remaining))
+            delay = min(delay * 2, RECORDING_POLL_MAX_DELAY)
     finally:
-        temp_file.close()
-        try:
-            os.unlink(temp_file.name)
-        except OSError:
-            pass
+        recording_registry.discard(recording_sid)
+
+NAME_INTRO_PHRASES = (
+    "my name is", "i'm", "this is", "i am", "hello i'm", "hi i'm", "you can call me",
+    "please call me", "everyone calls me", "i go by", "i prefer to be called",
+    "i like to be called", "my friends call me", "my nickname is", "i'm known as"
+)
+NAME_TOKEN = r"[\w'-]+"
+# Words that follow an intro phrase without being a name ("I am not sure", "but I'm happy");
+# a name is never taken from one of these.
+NON_NAME_WORDS = frozenset((
+    "i", "i'm", "im", "me", "my", "you", "we", "it", "it's", "that", "this", "the", "a", "an",
+    "not", "no", "yes", "so", "just", "really", "very", "also", "actually", "still", "sure",
+    "happy", "glad", "good", "fine", "well", "okay", "ok", "here", "calling", "going", "looking",
+    "trying", "interested", "known", "afraid", "sorry", "um", "uh", "and", "or", "but", "from", "in", "at",
+))
+NAME_WORD = (r"(?!(?:" + "|".join(re.escape(w) for w in sorted(NON_NAME_WORDS)) + r")(?![\w'-]))"
+             + NAME_TOKEN)
+
+def _phrase_pattern(phrase):
+    return r"\s+".join(re.escape(word) for word in phrase.split())
+
+# One pass over the transcript: the earliest intro phrase followed by a name wins, and among
+# phrases starting at the same position the longest wins (alternatives are tried longest
+# first). An optional "but/however [call me|I go by|...] <name>" later on gives the
+# preferred name.
+NAME_RE = re.compile(
+    r"\b(?:" + "|".join(_phrase_pattern(p) for p in sorted(NAME_INTRO_PHRASES, key=len, reverse=True)) + r")\b"
+    r"[\s,]+(?P<name>" + NAME_WORD + r")"
+    r"(?:.*?\b(?:but|however)\b[\s,]+"
+    r"(?:(?:you\s+can\s+|please\s+|just\s+)?call\s+me\s+|i\s+go\s+by\s+|i\s+prefer\s+|"
+    r"everyone\s+calls\s+me\s+|my\s+friends\s+call\s+me\s+|it's\s+)?"
+    r"(?P<preferred>" + NAME_WORD + r"))?",
+    re.IGNORECASE | re.DOTALL
+)
+FIRST_WORD_RE = re.compile(NAME_TOKEN)
 
 def extract_name_and_preference(transcript):
     """Extract name and preferred name from transcript."""
     if not transcript:
         return "there", None
-    
-    words = transcript.strip().lower().split()
-    if not words:
+
+    match = NAME_RE.search(transcript)
+    if match:
+        preferred_name = match.group('preferred')
+        return match.group('name').lower(), preferred_name.lower() if preferred_name else None
+
+    first_word = FIRST_WORD_RE.search(transcript)
+    if not first_word or first_word.group(0).lower() in NON_NAME_WORDS:
         return "there", None
-    
-    intro_patterns = {
-        "my name is": 3,
-        "i'm": 1,
-        "this is": 2,
-        "i am": 2,
-        "hello i'm": 2,
-        "hi i'm": 2,
-        "you can call me": 3,
-        "please call me": 2,
-        "everyone calls me": 2,
-        "i go by": 2,
-        "i prefer to be called": 3,
-        "i like to be called": 3,
-        "my friends call me": 3,
-        "my nickname is": 2,
-        "i'm known as": 2
-    }
-    
-    transcript_lower = transcript.lower()
-    for pattern, skip in intro_patterns.items():
-        if pattern in transcript_lower:
-            parts = transcript_lower.split(pattern, 1)
-            if len(parts) > 1:
-                name_parts = parts[1].strip().split()
-                if name_parts:
-                    preferred_name = None
-                    if "but" in name_parts or "however" in name_parts:
-                        for i, word in enumerate(name_parts):
-                            if word in ["but", "however"] and i + 1 < len(name_parts):
-                                preferred_name = name_parts[i + 1]
-                                break
-                    return name_parts[0], preferred_name
-    
-    return words[0], None
+    return first_word.group(0).lower(), None
+
+@lru_cache(maxsize=8)
+def compile_say_tag(tts_items):
+    """Build the opening <Say> tag once per distinct TTS_CONFIG."""
+    tts = dict(tts_items)
+    say_attributes = f'voice="{tts["voice"]}" language="{tts["language"]}"'
+    if tts["speech_rate"] != "medium":
+        say_attributes += f' rate="{tts["speech_rate"]}"'
+    if tts["pitch"] != "default":
+        say_attributes += f' pitch="{tts["pitch"]}"'
+    if tts["volume"] != "default":
+        say_attributes += f' volume="{tts["volume"]}"'
+    return f'<Say {say_attributes}>'
 
-def generate_twiml_response(text, record_next=False, qid=0):
+def generate_twiml_response(text, record_next=False, qid=0, redirect=None):
     """Generate TwiML response with enhanced TTS configuration"""
-    say_attributes = f'voice="{TTS_CONFIG["voice"]}" language="{TTS_CONFIG["language"]}"'
-    if TTS_CONFIG["speech_rate"] != "medium":
-        say_attributes += f' rate="{TTS_CONFIG["speech_rate"]}"'
-    if TTS_CONFIG["pitch"] != "default":
-        say_attributes += f' pitch="{TTS_CONFIG["pitch"]}"'
-    if TTS_CONFIG["volume"] != "default":
-        say_attributes += f' volume="{TTS_CONFIG["volume"]}"'
-    
-    twiml = f'<Response><Say {say_attributes}>{text}</Say>'
+    say_tag = compile_say_tag(tuple(TTS_CONFIG.items()))
+
+    twiml = '<Response>'
+    if text:
+        twiml += f'{say_tag}{text}</Say>'
     if record_next:
-        twiml += f'<Record maxLength="10" action="/handle-response?q={qid}" method="POST" playBeep="false" />'
+        twiml += (
+            f'<Record maxLength="10" action="/handle-response?q={qid}" method="POST" playBeep="false" '
+            'recordingStatusCallback="/recording-status" recordingStatusCallbackEvent="completed" />'
+        )
+    if redirect:
+        twiml += f'<Redirect method="POST">{redirect}</Redirect>'
     twiml += '</Response>'
     return twiml
 
+def _load_token_encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model("gpt-3.5-turbo")
+    except Exception:  # the encoding file could not be fetched
+        return None
+
+_token_encoding = _load_token_encoding()
+
+def count_tokens(text):
+    if _token_encoding is not None:
+        return len(_token_encoding.encode(text))
+    return len(text) // 4 + 1
+
+def build_turn_messages(state):
+    """Build the chat prompt for a turn within CONTEXT_TOKEN_BUDGET.
+
+    Returns (messages, token_counts); token_counts compares the prompt actually
+    sent with what the whole conversation log would have cost.
+    """
+    system_prompt = (
+        f"You are a friendly interviewer. Address the caller by their preferred name ({state.get('preferred_name')}) "
+        f"if they have one, otherwise use their first name ({state.get('first_name')}). "
+        "Ask one question at a time and never mention you're an AI. "
+        "When done, say 'Thank you, that's all I need today.' and hang up."
+    )
+    messages = [{"role": "system", "content": system_prompt}]
+    if state.get('summary'):
+        messages.append({"role": "system", "content": f"Summary of the conversation so far: {state['summary']}"})
+
+    conversation_log = state['conversation_log']
+    recent = conversation_log[state.get('summarized_turns', 0):]
+    line_tokens = [count_tokens(line) for line in recent]
+    prompt_tokens = sum(count_tokens(m["content"]) for m in messages) + sum(line_tokens)
+    # If the summary has not caught up yet, drop the oldest verbatim turns rather than overflow.
+    while prompt_tokens > CONTEXT_TOKEN_BUDGET and len(recent) > 1:
+        prompt_tokens -= line_tokens.pop(0)
+        recent = recent[1:]
+    messages.append({"role": "user", "content": "\n".join(recent)})
+
+    token_counts = {
+        'prompt_tokens': prompt_tokens,
+        'full_log_tokens': count_tokens(system_prompt) + sum(count_tokens(line) for line in conversation_log)
+    }
+    return messages, token_counts
+
+# Calls with a summary update in flight. Only touched on the turn loop.
+_summaries_in_flight = set()
+
+def schedule_summary(state):
+    """Fold turns older than the recent window into the summary once a full batch is waiting."""
+    call_sid = state['call_sid']
+    summarized_turns = state.get('summarized_turns', 0)
+    fold_until = len(state['conversation_log']) - CONTEXT_RECENT_TURNS
+    if fold_until - summarized_turns < CONTEXT_SUMMARY_BATCH or call_sid in _summaries_in_flight:
+        return
+    _summaries_in_flight.add(call_sid)
+    asyncio.ensure_future(update_summary(
+        call_sid, state.get('summary', ""), state['conversation_log'][summarized_turns:fold_until], fold_until
+    ))
+
+async def update_summary(call_sid, summary, lines, summarized_turns):
+    try:
+        with stage_timer('summary'):
+            chat = await client.chat.completions.create(
+                model=SUMMARY_MODEL,
+                messages=[
+                    {"role": "system", "content": (
+                        "You maintain a running summary of a phone interview. Merge the new lines into the "
+                        "current summary, keeping every fact the caller has shared. Reply with the summary only."
+                    )},
+                    {"role": "user", "content": f"Current summary: {summary or '(none)'}\n\nNew lines:\n" + "\n".join(lines)}
+                ],
+                temperature=0,
+                max_tokens=CONTEXT_SUMMARY_MAX_TOKENS
+            )
+        new_summary = chat.choices[0].message.content.strip()
+        await asyncio.to_thread(
+            conversation_store.update, call_sid, summary=new_summary, summarized_turns=summarized_turns
+        )
+    except Exception as e:
+        traceback.print_exc()
+        print("Error updating conversation summary:", e)
+    finally:
+        _summaries_in_flight.discard(call_sid)
+
+def is_closing_line(next_line):
+    return "thank you, that's all i need today" in next_line.lower()
+
+class CallTasks:
+    """Background tasks (anything with cancel()) keyed by call_sid, bounded by count and age.
+
+    Tasks past `ttl` or beyond `max_entries` (oldest first) are cancelled and dropped,
+    so calls that end before their task is picked up do not leak. Only touched on the
+    turn loop.
+    """
+
+    def __init__(self, ttl, max_entries=CONVERSATION_STORE_MAX_CALLS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._tasks = OrderedDict()  # call_sid -> (started_at, task)
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl
+        while self._tasks:
+            call_sid, (started_at, task) = next(iter(self._tasks.items()))
+            if started_at >= cutoff and len(self._tasks) <= self.max_entries:
+                break
+            del self._tasks[call_sid]
+            task.cancel()
+
+    def put(self, call_sid, task):
+        self.discard(call_sid)
+        self._tasks[call_sid] = (time.monotonic(), task)
+        self._expire()
+
+    def get(self, call_sid):
+        self._expire()
+        entry = self._tasks.get(call_sid)
+        return entry[1] if entry else None
+
+    def pop(self, call_sid):
+        self._expire()
+        entry = self._tasks.pop(call_sid, None)
+        return entry[1] if entry else None
+
+    def discard(self, call_sid):
+        """Cancel and drop the call's task, if any."""
+        entry = self._tasks.pop(call_sid, None)
+        if entry:
+            entry[1].cancel()
+
+# Rest-of-reply tasks for streamed replies, keyed by call_sid.
+_reply_continuations = CallTasks(REPLY_CONTINUATION_TTL)
+SENTENCE_BOUNDARY_RE = re.compile(r'[.!?](?=\s)')
+
+async def _collect_rest(chunks, first_sentence, rest, started, cache_key=None):
+    async for chunk in chunks:
+        if chunk.choices and chunk.choices[0].delta.content:
+            rest += chunk.choices[0].delta.content
+    observe_stage('llm', time.perf_counter() - started)
+    rest = rest.strip()
+    if cache_key:
+        reply_cache.put(cache_key, f"{first_sentence} {rest}".strip())
+    return first_sentence, rest
+
+async def stream_reply(call_sid, messages, cache_key=None):
+    """Stream the chat completion and return as soon as its first sentence is complete.
+
+    Returns (text, finished). When finished is False, `text` is the first sentence
+    and the rest of the stream keeps being consumed in the background until
+    continue_reply picks it up.
+    """
+    started = time.perf_counter()
+    stream = await client.chat.completions.create(
+        model="gpt-3.5-turbo",
+        messages=messages,
+        temperature=0.7,
+        stream=True
+    )
+    chunks = stream.__aiter__()
+    text = ""
+    async for chunk in chunks:
+        if not (chunk.choices and chunk.choices[0].delta.content):
+            continue
+        text += chunk.choices[0].delta.content
+        match = SENTENCE_BOUNDARY_RE.search(text, FIRST_SENTENCE_MIN_CHARS)
+        if match:
+            first_sentence = text[:match.end()].strip()
+            observe_stage('llm_first_sentence', time.perf_counter() - started)
+            _reply_continuations.put(call_sid, asyncio.ensure_future(
+                _collect_rest(chunks, first_sentence, text[match.end():], started, cache_key)
+            ))
+            return first_sentence, False
+    observe_stage('llm_first_sentence', time.perf_counter() - started)
+    observe_stage('llm', time.perf_counter() - started)
+    if cache_key:
+        reply_cache.put(cache_key, text.strip())
+    return text.strip(), True
+
+async def continue_reply(call_sid):
+    """Wait for the rest of a streamed reply; returns (full_line, rest) or None if unknown."""
+    task = _reply_continuations.pop(call_sid)
+    if task is None:
+        return None
+    first_sentence, rest = await task
+    return f"{first_sentence} {rest}".strip(), rest
+
+@lru_cache(maxsize=64)
+def _static_twiml(text, record_next, qid, tts_items):
+    return generate_twiml_response(text, record_next=record_next, qid=qid).encode()
+
+def static_twiml(text, record_next=False, qid=0):
+    """Encoded TwiML for fixed prompts, built once per TTS_CONFIG and reused."""
+    return _static_twiml(text, record_next, qid, tuple(TTS_CONFIG.items()))
+
+def normalize_text(text):
+    """Lowercase and strip punctuation and extra whitespace, for cache keys and matching."""
+    return " ".join(re.sub(r"[^\w\s']", " ", text.lower()).split())
+
+class ReplyCache:
+    """LRU cache of LLM replies keyed by the normalized prompt messages."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._replies = OrderedDict()
+
+    @staticmethod
+    def key(messages):
+        normalized = [(m["role"], normalize_text(m["content"])) for m in messages]
+        return hashlib.sha256(json.dumps(normalized).encode()).hexdigest()
+
+    def get(self, key):
+        if not self.max_entries:
+            return None
+        with self._lock:
+            reply = self._replies.get(key)
+            if reply is None:
+                self.misses += 1
+                return None
+            self._replies.move_to_end(key)
+            self.hits += 1
+            return reply
+
+    def put(self, key, reply):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._replies[key] = reply
+            self._replies.move_to_end(key)
+            while len(self._replies) > self.max_entries:
+                self._replies.popitem(last=False)
+
+reply_cache = ReplyCache(REPLY_CACHE_SIZE)
+metrics_registry.register(CallbackMetric(
+    'reply_cache_hits_total', 'LLM replies served from the reply cache.', 'counter', lambda: reply_cache.hits
+))
+metrics_registry.register(CallbackMetric(
+    'reply_cache_misses_total', 'Reply cache lookups that went to the LLM.', 'counter', lambda: reply_cache.misses
+))
+
+class Speculation:
+    """Predicted replies being computed for the caller's answer to turn `qid`."""
+
+    def __init__(self, qid, task):
+        self.qid = qid
+        self.task = task
+
+    def cancel(self):
+        self.task.cancel()
+
+# Pending speculation per call; a call that hangs up mid-conversation leaves one behind
+# until CONVERSATION_TTL or the size bound drops it.
+_speculations = CallTasks(CONVERSATION_TTL)
+SPECULATIONS = metrics_registry.register(
+    Counter('speculation_total', 'Speculative reply lookups by outcome (hit, miss, not_ready).')
+)
+SPECULATION_SAVED = metrics_registry.register(
+    Counter('speculation_saved_seconds_total', 'Estimated LLM time saved by speculative hits.')
+)
+
+def schedule_speculation(state, qid, question):
+    """Start predicting replies for the answer to `question` (turn `qid`)."""
+    state = dict(state, conversation_log=list(state['conversation_log']))
+    messages, _ = build_turn_messages(state)
+    _speculations.put(
+        state['call_sid'], Speculation(qid, asyncio.ensure_future(speculate_replies(messages, question)))
+    )
+
+async def speculate_replies(messages, question):
+    with stage_timer('speculation'):
+        chat = await client.chat.completions.create(
+            model="gpt-3.5-turbo",
+            messages=messages + [
+                {"role": "assistant", "content": question},
+                {"role": "user", "content": (
+                    f"Predict the {SPECULATION_CANDIDATES} most likely short answers the caller will give "
+                    "to your last question and, for each, exactly what you would say next. Reply with "
+                    'JSON only: [{"answer": "...", "reply": "..."}]'
+                )}
+            ],
+            temperature=0.3
+        )
+    try:
+        candidates = json.loads(chat.choices[0].message.content)
+    except ValueError:
+        return []
+    if not isinstance(candidates, list):
+        return []
+    return [
+        (normalize_text(c['answer']), c['reply'].strip())
+        for c in candidates
+        if isinstance(c, dict) and isinstance(c.get('answer'), str) and isinstance(c.get('reply'), str)
+    ]
+
+def take_speculation(call_sid, qid, transcript):
+    """Return the predicted reply for turn `qid` if the transcript matches a predicted answer."""
+    speculation = _speculations.pop(call_sid)
+    if speculation is None:
+        return None
+    if speculation.qid != qid:
+        speculation.cancel()
+        return None
+    task = speculation.task
+    if not task.done():
+        task.cancel()
+        SPECULATIONS.inc(outcome='not_ready')
+        return None
+    if task.cancelled() or task.exception() is not None:
+        SPECULATIONS.inc(outcome='miss')
+        return None
+    heard = normalize_text(transcript)
+    score, reply = max(
+        ((difflib.SequenceMatcher(None, heard, answer).ratio(), reply) for answer, reply in task.result()),
+        default=(0.0, None)
+    )
+    if score < SPECULATION_MATCH_THRESHOLD:
+        SPECULATIONS.inc(outcome='miss')
+        return None
+    SPECULATIONS.inc(outcome='hit')
+    SPECULATION_SAVED.inc(STAGE_LATENCY.mean(stage='llm') or 0.0)
+    return reply
+
+def _speculate_after_stream(state, qid, task):
+    if task.cancelled() or task.exception() is not None:
+        return
+    first_sentence, rest = task.result()
+    next_line = f"{first_sentence} {rest}".strip()
+    if not is_closing_line(next_line):
+        schedule_speculation(state, qid, next_line)
+
+def speculation_stats():
+    outcomes = {labels['outcome']: value for _, labels, value in SPECULATIONS.samples()}
+    lookups = sum(outcomes.values())
+    return {
+        'lookups': lookups,
+        'hits': outcomes.get('hit', 0),
+        'hit_rate': outcomes.get('hit', 0) / lookups if lookups else None,
+        'saved_seconds': sum(value for _, _, value in SPECULATION_SAVED.samples())
+    }
+
+async def run_call_turn(state, qid, recording_url, recording_sid=None):
+    """Process one caller answer: fetch, transcribe, record it and generate the next line.
+
+    `state` holds the call's conversation fields and is updated in place; the
+    return value is the TwiML to send back to Twilio.
+    """
+    call_sid = state['call_sid']
+    _turn_context.set((call_sid, qid))
+    try:
+        audio_file = await fetch_recording(recording_url, recording_sid)
+        with stage_timer('transcribe'):
+            resp = await client.audio.transcriptions.create(
+                model="whisper-1",
+                file=(audio_file.name, audio_file)
+            )
+        transcript = resp.text
+    except (RecordingNotReady, httpx.HTTPError) as e:
+        print("Error fetching recording:", e)
+        return static_twiml("I'm having trouble hearing you. Could you please speak a bit louder and try again?")
+    except Exception as e:
+        traceback.print_exc()
+        print("Error during transcription:", e)
+        return static_twiml("I'm sorry, there was a technical issue understanding your answer. Let's try again.")
+
+    print("Transcript:", transcript)
+
+    conversation_log = state['conversation_log']
+
+    if qid == 0:
+        first_name, preferred_name = extract_name_and_preference(transcript)
+        state['first_name'] = first_name
+        if preferred_name:
+            state['preferred_name'] = preferred_name
+        conversation_log.append(f"Full name: {transcript}")
+    else:
+        first_name = state.get('preferred_name') or state.get('first_name', 'there')
+        conversation_log.append(f"{first_name}: {transcript}")
+
+    messages, token_counts = build_turn_messages(state)
+    print("Prompt tokens:", token_counts['prompt_tokens'], "of", token_counts['full_log_tokens'], "for the full log")
+    schedule_summary(state)
+
+    turn_entry = {
+        'call_sid': call_sid,
+        'line': conversation_log[-1],
+        'first_name': state.get('first_name'),
+        'preferred_name': state.get('preferred_name'),
+        'timestamp': datetime.now().isoformat()
+    }
+    turn_entry.update(token_counts)
+    with stage_timer('persist'):
+        await asyncio.to_thread(save_conversation, call_sid, turn_entry)
+
+    try:
+        cache_key = reply_cache.key(messages) if reply_cache.max_entries else None
+        next_line = reply_cache.get(cache_key) if cache_key else None
+        if next_line is not None:
+            print("Reply cache hit")
+        elif SPECULATIVE_MODE:
+            next_line = take_speculation(call_sid, qid, transcript)
+            if next_line is not None:
+                print("Speculative reply hit")
+        if next_line is None and STREAM_RESPONSES:
+            next_line, finished = await stream_reply(call_sid, messages, cache_key)
+            if not finished:
+                print("First sentence:", next_line)
+                if SPECULATIVE_MODE:
+                    _reply_continuations.get(call_sid).add_done_callback(
+                        lambda task: _speculate_after_stream(state, qid + 1, task)
+                    )
+                return generate_twiml_response(next_line, redirect=f"/continue-response?q={qid}")
+        elif next_line is None:
+            with stage_timer('llm'):
+                chat = await client.chat.completions.create(
+                    model="gpt-3.5-turbo",
+                    messages=messages,
+                    temperature=0.7
+                )
+            next_line = chat.choices[0].message.content.strip()
+            if cache_key:
+                reply_cache.put(cache_key, next_line)
+    except Exception as e:
+        traceback.print_exc()
+        print("Error during GPT analysis:", e)
+        return static_twiml("I'm having trouble processing your response. Let's try again.")
+
+    print("Next Line:", next_line)
+
+    if is_closing_line(next_line):
+        state['conversation_complete'] = True
+        with stage_timer('persist'):
+            await asyncio.to_thread(finish_conversation, call_sid)
+        return generate_twiml_response(next_line)
+    if SPECULATIVE_MODE:
+        schedule_speculation(state, qid + 1, next_line)
+    return generate_twiml_response(next_line, record_next=True, qid=qid+1)
+
+# Turn job queue
+# Turns run on a fixed pool of worker threads fed by a bounded queue, decoupled from the
+# Twilio webhook. Like streamed replies, results live in the worker process that ran
+# the turn, so /turn-result must reach that process.
+class TurnJob:
+    def __init__(self, call_sid, qid):
+        self.id = uuid.uuid4().hex
+        self.call_sid = call_sid
+        self.qid = qid
+        self.created = time.monotonic()
+        self.future = concurrent.futures.Future()
+
+class TurnJobQueue:
+    def __init__(self, workers=TURN_QUEUE_WORKERS, max_depth=TURN_QUEUE_MAX_DEPTH):
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=max_depth)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._started = False
+        self.in_flight = 0
+        self.rejected = 0
+
+    def _ensure_started(self):
+        # Threads are started on first use so they exist in each gunicorn worker, not the master.
+        with self._lock:
+            if self._started:
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f"turn-worker-{i}", daemon=True).start()
+            self._started = True
+
+    def _work(self):
+        while True:
+            job, fn, args = self._queue.get()
+            observe_stage('queue_wait', time.monotonic() - job.created, job.call_sid, job.qid)
+            with self._lock:
+                self.in_flight += 1
+            try:
+                job.future.set_result(fn(*args))
+            except BaseException as e:
+                job.future.set_exception(e)
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+                self._queue.task_done()
+
+    def _prune(self):
+        cutoff = time.monotonic() - TURN_RESULT_TTL
+        for job_id in [j.id for j in self._jobs.values() if j.future.done() and j.created < cutoff]:
+            del self._jobs[job_id]
+
+    def submit(self, call_sid, qid, fn, *args):
+        """Queue fn(*args) for a call turn; raises queue.Full when the queue is at capacity."""
+        self._ensure_started()
+        job = TurnJob(call_sid, qid)
+        try:
+            self._queue.put_nowait((job, fn, args))
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            raise
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def depth(self):
+        return self._queue.qsize()
+
+turn_queue = TurnJobQueue()
+metrics_registry.register(CallbackMetric(
+    'turn_queue_depth', 'Call turns waiting for a worker thread.', 'gauge', turn_queue.depth
+))
+metrics_registry.register(CallbackMetric(
+    'turn_queue_in_flight', 'Call turns currently being processed.', 'gauge', lambda: turn_queue.in_flight
+))
+metrics_registry.register(CallbackMetric(
+    'turn_queue_rejected_total', 'Call turns turned away because the queue was full.', 'counter',
+    lambda: turn_queue.rejected
+))
+
+def process_turn(state, qid, recording_url, recording_sid):
+    """Job body: run the turn on the turn loop and persist what it changed."""
+    before = dict(state, conversation_log=list(state['conversation_log']))
+    twiml = run_async(run_call_turn(state, qid, recording_url, recording_sid), timeout=TURN_JOB_TIMEOUT)
+    conversation_store.save_delta(before, state)
+    return twiml
+
+def turn_result_response(job, wait):
+    """Return the job's TwiML if it finishes within `wait` seconds, else keep Twilio polling."""
+    try:
+        twiml = job.future.result(timeout=wait)
+    except concurrent.futures.TimeoutError:
+        return Response(
+            f'<Response><Pause length="{TURN_POLL_PAUSE}"/>'
+            f'<Redirect method="POST">/turn-result?job={job.id}</Redirect></Response>',
+            mimetype='text/xml'
+        )
+    except Exception as e:
+        turn_queue.forget(job.id)
+        traceback.print_exc()
+        print("Call turn failed:", e)
+        return Response(
+            static_twiml("I'm having technical difficulties. Please try again in a moment."),
+            mimetype='text/xml'
+        )
+    turn_queue.forget(job.id)
+    observe_stage('turn', time.monotonic() - job.created, job.call_sid, job.qid)
+    return Response(twiml, mimetype='text/xml')
+
+# Google API clients
+# Credentials and each API's discovery document are loaded once per process. The
+# credentials are shared and refreshed under a lock shortly before they expire.
+# googleapiclient services wrap an httplib2.Http, which is not thread-safe, so each
+# thread builds its own service per API from the cached document (no I/O) and keeps it.
+class GoogleNotConfigured(Exception):
+    pass
+
+class GoogleClientFactory:
+    def __init__(self, scopes, api_endpoints=None, refresh_margin=GOOGLE_TOKEN_REFRESH_MARGIN):
+        self.scopes = scopes
+        self.api_endpoints = {api: url for api, url in (api_endpoints or {}).items() if url}
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self._lock = threading.Lock()
+        self._credentials = None
+        self._discovery_docs = {}
+        self._local = threading.local()
+
+    def _load_credentials(self):
+        service_account_file = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+        if service_account_file:
+            return service_account.Credentials.from_service_account_file(
+                service_account_file, scopes=self.scopes)
+        if self.api_endpoints:
+            return AnonymousCredentials()
+        raise GoogleNotConfigured('Google credentials not configured')
+
+    def credentials(self):
+        with self._lock:
+            if self._credentials is None:
+                self._credentials = self._load_credentials()
+            credentials = self._credentials
+            if isinstance(credentials, AnonymousCredentials):
+                return credentials
+            # expiry is a naive UTC datetime
+            if (not credentials.valid or credentials.expiry is None
+                    or credentials.expiry - self.refresh_margin <= datetime.utcnow()):
+                credentials.refresh(GoogleAuthRequest())
+            return credentials
+
+    def _discovery_document(self, api, version):
+        with self._lock:
+            doc = self._discovery_docs.get((api, version))
+            if doc is None:
+                doc = self._discovery_docs[(api, version)] = discovery_cache.get_static_doc(api, version)
+            return doc
+
+    def service(self, api='drive', version='v3'):
+        credentials = self.credentials()
+        services = getattr(self._local, 'services', None)
+        if services is None:
+            services = self._local.services = {}
+        service = services.get((api, version))
+        if service is None:
+            endpoint = self.api_endpoints.get(api)
+            service = build_from_document(
+                self._discovery_document(api, version),
+                credentials=credentials,
+                client_options={'api_endpoint': endpoint} if endpoint else None,
+            )
+            services[(api, version)] = service
+        return service
+
+google_clients = GoogleClientFactory(
+    GOOGLE_SCOPES,
+    api_endpoints={'drive': DRIVE_API_ENDPOINT, 'sheets': SHEETS_API_ENDPOINT},
+)
+
+# Sheet search index
+# The survey spreadsheets matching SHEET_SEARCH_QUERY, keyed by file id. A full listing
+# records a changes start token first, so nothing changed while paging is missed; later
+# syncs only read the changes since that token. The /api/sheet-search payload, including
+# its aggregates, is rebuilt whenever the index changes, so serving it is a dict lookup.
+SPREADSHEET_MIME_TYPE = 'application/vnd.google-apps.spreadsheet'
+SURVEY_SHEET_MARKER = '(Survey) (Responses)'
+DRIVE_FILE_FIELDS = 'id, name, mimeType, createdTime, modifiedTime'
+
+def is_survey_sheet(file):
+    return file.get('mimeType') == SPREADSHEET_MIME_TYPE and SURVEY_SHEET_MARKER in file.get('name', '')
+
+def sheet_search_payload(files):
+    """The /api/sheet-search response body for the given indexed files."""
+    if not files:
+        return {
+            'total_sheets': 0,
+            'oldest_created': None,
+            'newest_modified': None,
+            'files': []
+        }
+
+    # Process files
+    processed_files = []
+    oldest_created = None
+    newest_modified = None
+
+    for file in sorted(files, key=lambda f: f['createdTime']):
+        created_time = datetime.fromisoformat(file['createdTime'].replace('Z', '+00:00'))
+        modified_time = datetime.fromisoformat(file['modifiedTime'].replace('Z', '+00:00'))
+
+        if oldest_created is None or created_time < oldest_created:
+            oldest_created = created_time
+        if newest_modified is None or modified_time > newest_modified:
+            newest_modified = modified_time
+
+        processed_files.append({
+            'name': file['name'],
+            'created': created_time.strftime('%Y-%m-%d')
+        })
+
+    return {
+        'total_sheets': len(files),
+        'oldest_created': oldest_created.strftime('%Y-%m-%d') if oldest_created else None,
+        'newest_modified': newest_modified.strftime('%Y-%m-%d') if newest_modified else None,
+        'files': processed_files
+    }
+
+class SheetIndex:
+    def __init__(self, clients, path=SHEET_INDEX_PATH, sync_interval=SHEET_INDEX_SYNC_INTERVAL):
+        self.clients = clients
+        self.path = path
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._files = {}
+        self._start_page_token = None
+        self._payload = None
+        self._synced_at = 0.0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._files = saved.get('files', {})
+        self._start_page_token = saved.get('start_page_token')
+        self._payload = sheet_search_payload(list(self._files.values()))
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            json.dump({'start_page_token': self._start_page_token, 'files': self._files}, out)
+        os.replace(tmp_path, self.path)
+
+    def _rebuild(self, service):
+        token = service.changes().getStartPageToken().execute()['startPageToken']
+        files = {}
+        page_token = None
+        while True:
+            results = service.files().list(
+                q=SHEET_SEARCH_QUERY,
+                fields=f"nextPageToken, files({DRIVE_FILE_FIELDS})",
+                orderBy="createdTime",
+                pageSize=DRIVE_PAGE_SIZE,
+                pageToken=page_token
+            ).execute()
+            for file in results.get('files', []):
+                files[file['id']] = file
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                break
+        self._files = files
+        self._start_page_token = token
+
+    def _apply_changes(self, service):
+        """Apply changes since the stored token; True if the index changed."""
+        changed = False
+        page_token = self._start_page_token
+        while True:
+            results = service.changes().list(
+                pageToken=page_token,
+                fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({DRIVE_FILE_FIELDS}))",
+                pageSize=DRIVE_PAGE_SIZE,
+                includeRemoved=True,
+                spaces='drive'
+            ).execute()
+            for change in results.get('changes', []):
+                file = change.get('file')
+                if not change.get('removed') and file and is_survey_sheet(file):
+                    if self._files.get(change['fileId']) != file:
+                        self._files[change['fileId']] = file
+                        changed = True
+                elif self._files.pop(change['fileId'], None) is not None:
+                    changed = True
+            if 'newStartPageToken' in results:
+                self._start_page_token = results['newStartPageToken']
+                return changed
+            page_token = results['nextPageToken']
+
+    def _sync(self):
+        with stage_timer('drive_client'):
+            service = self.clients.service()
+        changed = True
+        if self._start_page_token is None:
+            self._rebuild(service)
+        else:
+            try:
+                changed = self._apply_changes(service)
+            except HttpError as error:
+                # An expired or invalid start token means the changes feed can't be resumed.
+                if error.resp.status not in (400, 404, 410):
+                    raise
+                self._rebuild(service)
+        if changed or self._payload is None:
+            self._payload = sheet_search_payload(list(self._files.values()))
+        self._save()
+        self._synced_at = time.monotonic()
+
+    def files(self):
+        """A snapshot of the indexed files, synced like payload()."""
+        self.payload()
+        with self._lock:
+            return list(self._files.values())
+
+    def payload(self):
+        """The current payload, syncing first if the last sync is older than sync_interval.
+
+        While one thread syncs, others keep serving the previous payload; only the very
+        first sync in a process without a saved index makes everyone wait.
+        """
+        if time.monotonic() - self._synced_at < self.sync_interval:
+            return self._payload
+        blocking = self._payload is None
+        if not self._lock.acquire(blocking=blocking):
+            return self._payload
+        try:
+            if time.monotonic() - self._synced_at >= self.sync_interval:
+                with stage_timer('drive_sync'):
+                    self._sync()
+            return self._payload
+        finally:
+            self._lock.release()
+
+sheet_index = SheetIndex(google_clients)
+
+# Response cache
+# Rendered JSON bodies keyed by request query string. Each entry carries an ETag (a hash
+# of the body) and a Last-Modified time that only moves when the body changes, so
+# dashboards reloading an unchanged view get a 304 without a body.
+RESPONSE_CACHE_LOOKUPS = metrics_registry.register(
+    Counter('response_cache_lookups_total', 'Response cache lookups by cache and outcome (hit, stale, miss).')
+)
+RESPONSE_NOT_MODIFIED = metrics_registry.register(
+    Counter('response_not_modified_total', 'Conditional requests answered with 304 Not Modified.')
+)
+
+class CachedResponse:
+    __slots__ = ('body', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, body, etag, last_modified, stored_at):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+class ResponseCache:
+    def __init__(self, name, ttl, stale_ttl, max_entries):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._refreshing = set()
+
+    def get(self, key, render):
+        """Return the CachedResponse for key, calling render() for a body when needed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is not None:
+            age = time.monotonic() - entry.stored_at
+            if age < self.ttl:
+                RESPONSE_CACHE_LOOKUPS.inc(cache=self.name, result='hit')
+                return entry
+            if age < self.ttl + self.stale_ttl:
+                RESPONSE_CACHE_LOOKUPS.inc(cache=self.name, result='stale')
+                self._refresh_in_background(key, render)
+                return entry
+        RESPONSE_CACHE_LOOKUPS.inc(cache=self.name, result='miss')
+        return self._store(key, render())
+
+    def _store(self, key, body):
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        with self._lock:
+            previous = self._entries.get(key)
+            if previous is not None and previous.etag == etag:
+                last_modified = previous.last_modified
+            else:
+                last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+            entry = CachedResponse(body, etag, last_modified, time.monotonic())
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def _refresh_in_background(self, key, render):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._store(key, render())
+            except Exception as e:
+                # Keep serving the stale entry; the next stale hit retries.
+                print(f"Refreshing {self.name} response failed:", e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"{self.name}-refresh", daemon=True).start()
+
+def cached_json_response(cached):
+    """A JSON response for a CachedResponse, or 304 if the client's copy is current."""
+    response = Response(cached.body, mimetype='application/json')
+    response.set_etag(cached.etag)
+    response.last_modified = cached.last_modified
+    # Browsers may keep the body but must revalidate it on every reload.
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    response = response.make_conditional(request)
+    if response.status_code == 304:
+        RESPONSE_NOT_MODIFIED.inc(endpoint=request.endpoint)
+    return response
+
+sheet_search_cache = ResponseCache(
+    'sheet_search', SHEET_SEARCH_CACHE_TTL, SHEET_SEARCH_STALE_TTL, SHEET_SEARCH_CACHE_SIZE
+)
+
+# Survey response store
+# Answers are stored in long form, one row per (spreadsheet, sheet row, question), so
+# spreadsheets with different forms share one table. survey_answers_by_question covers
+# the per-question queries, which never touch the table itself.
+class SurveyResponseStore:
+    def __init__(self, path=SURVEY_STORE_PATH):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS survey_sheets ("
+            "spreadsheet_id TEXT PRIMARY KEY, name TEXT NOT NULL, modified_time TEXT NOT NULL, "
+            "row_count INTEGER NOT NULL, synced_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS survey_answers ("
+            "spreadsheet_id TEXT NOT NULL, row_number INTEGER NOT NULL, question TEXT NOT NULL, "
+            "answer TEXT NOT NULL, PRIMARY KEY (spreadsheet_id, row_number, question)) WITHOUT ROWID"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS survey_answers_by_question "
+            "ON survey_answers (question, answer, spreadsheet_id)"
+        )
+
+    def synced_versions(self):
+        """{spreadsheet_id: modifiedTime} of every stored spreadsheet."""
+        with self._lock:
+            return dict(self._db.execute("SELECT spreadsheet_id, modified_time FROM survey_sheets"))
+
+    @staticmethod
+    def _answers(spreadsheet_id, values):
+        """Yield answer rows for sheet values whose first row holds the questions."""
+        if not values:
+            return
+        questions = []
+        seen = {}
+        for header in values[0]:
+            question = str(header).strip()
+            # Forms can repeat a question title; keep each column apart.
+            seen[question] = seen.get(question, 0) + 1
+            questions.append(question if seen[question] == 1 else f"{question} ({seen[question]})")
+        for row_number, row in enumerate(values[1:], start=2):
+            for question, answer in zip(questions, row):
+                if question and answer != '':
+                    yield spreadsheet_id, row_number, question, str(answer)
+
+    def replace_sheet(self, file, values):
+        """Replace a spreadsheet's answers with `values`; returns the number of data rows."""
+        row_count = max(len(values) - 1, 0)
+        with self._lock:
+            self._db.execute("BEGIN")
+            try:
+                self._db.execute("DELETE FROM survey_answers WHERE spreadsheet_id = ?", (file['id'],))
+                self._db.executemany(
+                    "INSERT INTO survey_answers (spreadsheet_id, row_number, question, answer) VALUES (?, ?, ?, ?)",
+                    self._answers(file['id'], values)
+                )
+                self._db.execute(
+                    "INSERT OR REPLACE INTO survey_sheets "
+                    "(spreadsheet_id, name, modified_time, row_count, synced_at) VALUES (?, ?, ?, ?, ?)",
+                    (file['id'], file['name'], file['modifiedTime'], row_count, time.time())
+                )
+                self._db.execute("COMMIT")
+            except Exception:
+                self._db.execute("ROLLBACK")
+                raise
+        return row_count
+
+    def remove_sheets(self, spreadsheet_ids):
+        if not spreadsheet_ids:
+            return
+        with self._lock:
+            self._db.execute("BEGIN")
+            for spreadsheet_id in spreadsheet_ids:
+                self._db.execute("DELETE FROM survey_answers WHERE spreadsheet_id = ?", (spreadsheet_id,))
+                self._db.execute("DELETE FROM survey_sheets WHERE spreadsheet_id = ?", (spreadsheet_id,))
+            self._db.execute("COMMIT")
+
+    def questions(self):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT question, COUNT(*) FROM survey_answers GROUP BY question ORDER BY question"
+            ).fetchall()
+        return [{'question': question, 'answers': count} for question, count in rows]
+
+    def answer_counts(self, question, limit=100):
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT answer, COUNT(*) AS n FROM survey_answers WHERE question = ? "
+                "GROUP BY answer ORDER BY n DESC, answer LIMIT ?",
+                (question, limit)
+            ).fetchall()
+        return [{'answer': answer, 'count': count} for answer, count in rows]
+
+# Survey response ingestion
+# Spreadsheets are fetched with one values.batchGet each, SURVEY_INGEST_CONCURRENCY at a
+# time, and each one is written to the store as soon as it arrives. sheets_service is
+# called from the fetching threads and must return a Sheets v4 service (or a fake with
+# the same spreadsheets().values().batchGet(...).execute() surface).
+class SurveyIngestor:
+    def __init__(self, store, index, sheets_service, value_range=SURVEY_RESPONSE_RANGE,
+                 concurrency=SURVEY_INGEST_CONCURRENCY):
+        self.store = store
+        self.index = index
+        self.sheets_service = sheets_service
+        self.value_range = value_range
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+
+    def _fetch_values(self, spreadsheet_id):
+        result = self.sheets_service().spreadsheets().values().batchGet(
+            spreadsheetId=spreadsheet_id,
+            ranges=[self.value_range],
+            majorDimension='ROWS',
+            valueRenderOption='FORMATTED_VALUE',
+            fields='valueRanges(values)'
+        ).execute()
+        value_ranges = result.get('valueRanges', [])
+        return value_ranges[0].get('values', []) if value_ranges else []
+
+    def _ingest(self, file):
+        return self.store.replace_sheet(file, self._fetch_values(file['id']))
+
+    def sync(self):
+        """Bring the store in line with the sheet index; returns sync counts."""
+        with self._lock, stage_timer('survey_ingest'):
+            files = self.index.files()
+            synced = self.store.synced_versions()
+            changed = [f for f in files if synced.get(f['id']) != f['modifiedTime']]
+            removed = set(synced) - {f['id'] for f in files}
+            self.store.remove_sheets(removed)
+            rows = 0
+            if changed:
+                with concurrent.futures.ThreadPoolExecutor(
+                    max_workers=max(1, min(self.concurrency, len(changed))),
+                    thread_name_prefix='survey-ingest'
+                ) as pool:
+                    rows = sum(pool.map(self._ingest, changed))
+            return {
+                'sheets': len(files),
+                'fetched': len(changed),
+                'unchanged': len(files) - len(changed),
+                'removed': len(removed),
+                'rows': rows
+            }
+
+survey_store = SurveyResponseStore()
+survey_ingestor = SurveyIngestor(
+    survey_store, sheet_index, lambda: google_clients.service('sheets', 'v4')
+)
+
 # Web routes
 @app.route('/')
 def index():
@@ -312,6 +2376,7 @@ def update_user():
     user.username = request.form.get('username')
     user.role_id = request.form.get('role')
     db.session.commit()
+    identity_cache.forget(user.id)
     
     return jsonify({'success': True})
 
@@ -322,6 +2387,7 @@ def activate_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_active = True
     db.session.commit()
+    identity_cache.forget(user_id)
     return jsonify({'success': True})
 
 @app.route('/admin/user/<int:user_id>/deactivate', methods=['POST'])
@@ -331,39 +2397,65 @@ def deactivate_user(user_id):
     user = User.query.get_or_404(user_id)
     user.is_active = False
     db.session.commit()
+    identity_cache.forget(user_id)
     return jsonify({'success': True})
 
 # Call agent routes
 @app.route("/voice", methods=["POST"])
 def voice():
     call_sid = request.form.get('CallSid', 'unknown')
+
+    previous_conversation = load_conversation(call_sid) or {}
+    conversation_store.start(
+        call_sid,
+        previous_conversation.get('conversation_log', []),
+        first_name=previous_conversation.get('first_name', ""),
+        preferred_name=previous_conversation.get('preferred_name')
+    )
     
-    session['call_sid'] = call_sid
-    session['conversation_log'] = []
-    session['first_name'] = ""
-    session['preferred_name'] = None
-    session['conversation_complete'] = False
-    
-    previous_conversation = load_conversation(call_sid)
-    if previous_conversation:
-        session['conversation_log'] = previous_conversation.get('conversation_log', [])
-        session['first_name'] = previous_conversation.get('first_name', "")
-        session['preferred_name'] = previous_conversation.get('preferred_name')
-    
-    response = generate_twiml_response(
+    response = static_twiml(
         "Hi! Thanks for calling. I'd like to get to know you better. Can I please have your full name?",
         record_next=True,
         qid=0
     )
     return Response(response, mimetype='text/xml')
 
+@app.route("/recording-status", methods=["POST"])
+def recording_status():
+    """Twilio recordingStatusCallback: wakes up any turn waiting on this recording."""
+    recording_sid = request.form.get('RecordingSid')
+    if not recording_sid and request.form.get('RecordingUrl'):
+        recording_sid = recording_sid_from_url(request.form['RecordingUrl'])
+    if recording_sid and request.form.get('RecordingStatus') == 'completed':
+        recording_registry.mark_ready(recording_sid)
+    return Response(status=204)
+
+@app.route("/call-status", methods=["POST"])
+def call_status():
+    """Twilio call status callback (set as the number's status callback URL).
+
+    Compacts the call's journal as soon as the call ends, including calls the caller
+    hangs up on before the closing line.
+    """
+    call_sid = request.form.get('CallSid')
+    if call_sid and request.form.get('CallStatus') in ('completed', 'busy', 'failed', 'no-answer', 'canceled'):
+        get_turn_loop().call_soon_threadsafe(_reply_continuations.discard, call_sid)
+        get_turn_loop().call_soon_threadsafe(_speculations.discard, call_sid)
+        finish_conversation(call_sid)
+    return Response(status=204)
+
 @app.route("/handle-response", methods=["POST"])
 def handle_response():
-    call_sid = session.get('call_sid', 'unknown')
-    
-    if session.get('conversation_complete', False):
+    call_sid = request.form.get('CallSid', 'unknown')
+    state = conversation_store.get(call_sid)
+    if state is None:
+        # The call outlived CONVERSATION_TTL or was started on another store; begin afresh.
+        conversation_store.start(call_sid)
+        state = new_conversation_state(call_sid)
+
+    if state['conversation_complete']:
         return Response(
-            generate_twiml_response("The call is complete. Thank you for your time."),
+            static_twiml("The call is complete. Thank you for your time."),
             mimetype='text/xml'
         )
 
@@ -372,185 +2464,136 @@ def handle_response():
     
     if not recording_url:
         return Response(
-            generate_twiml_response("I'm sorry, I didn't receive your response. Could you please try again?"),
+            static_twiml("I'm sorry, I didn't receive your response. Could you please try again?"),
             mimetype='text/xml'
         )
     
+    # The callback reports the bare sid, so read it before the URL gets its .mp3 suffix
+    recording_sid = request.form.get("RecordingSid") or recording_sid_from_url(recording_url)
     recording_url += ".mp3"
     print("Recording URL:", recording_url)
 
-    max_retries = 3
-    retry_delay = 5
-    last_error = None
-    
-    for attempt in range(max_retries):
-        try:
-            time.sleep(retry_delay)
-            response = requests.get(recording_url, timeout=15)
-            response.raise_for_status()
-            
-            with safe_temp_file(suffix=".mp3") as tmp:
-                tmp.write(response.content)
-                tmp.flush()
-                
-                with open(tmp.name, "rb") as audio_file:
-                    resp = client.audio.transcriptions.create(
-                        model="whisper-1",
-                        file=audio_file
-                    )
-                transcript = resp.text
-                break
-        except requests.exceptions.RequestException as e:
-            last_error = e
-            if attempt < max_retries - 1:
-                retry_delay *= 2
-                continue
-            print("Error fetching recording:", e)
-            return Response(
-                generate_twiml_response("I'm having trouble hearing you. Could you please speak a bit louder and try again?"),
-                mimetype='text/xml'
-            )
-        except Exception as e:
-            traceback.print_exc()
-            print("Error during transcription:", e)
-            return Response(
-                generate_twiml_response("I'm sorry, there was a technical issue understanding your answer. Let's try again."),
-                mimetype='text/xml'
-            )
-    else:
-        print("All retries failed:", last_error)
+    try:
+        job = turn_queue.submit(call_sid, qid, process_turn, state, qid, recording_url, recording_sid)
+    except queue.Full:
+        print("Turn queue full; asking caller", call_sid, "to repeat")
         return Response(
-            generate_twiml_response("I'm having technical difficulties. Please try again in a moment."),
+            static_twiml("Sorry, I missed that. Could you please say it again?", record_next=True, qid=qid),
             mimetype='text/xml'
         )
+    return turn_result_response(job, TURN_RESULT_WAIT)
 
-    print("Transcript:", transcript)
-    
-    conversation_log = session.get('conversation_log', [])
-    
-    if qid == 0:
-        first_name, preferred_name = extract_name_and_preference(transcript)
-        session['first_name'] = first_name
-        if preferred_name:
-            session['preferred_name'] = preferred_name
-        conversation_log.append(f"Full name: {transcript}")
-    else:
-        first_name = session.get('preferred_name') or session.get('first_name', 'there')
-        conversation_log.append(f"{first_name}: {transcript}")
-    
-    session['conversation_log'] = conversation_log
-    
-    conversation_data = {
-        'call_sid': call_sid,
-        'conversation_log': conversation_log,
-        'first_name': session.get('first_name'),
-        'preferred_name': session.get('preferred_name'),
-        'timestamp': datetime.now().isoformat()
-    }
-    save_conversation(call_sid, conversation_data)
+@app.route("/turn-result", methods=["POST"])
+def turn_result():
+    """Polled by Twilio while a queued turn is still running."""
+    job = turn_queue.get(request.args.get("job", ""))
+    if job is None:
+        return Response(
+            static_twiml("I'm sorry, I didn't receive your response. Could you please try again?"),
+            mimetype='text/xml'
+        )
+    return turn_result_response(job, TURN_RESULT_WAIT)
+
+@app.route("/continue-response", methods=["POST"])
+def continue_response():
+    """Speak the remainder of a streamed reply, then record the caller's answer."""
+    call_sid = request.form.get('CallSid', 'unknown')
+    qid = int(request.args.get("q", 0))
 
     try:
-        system_prompt = (
-            f"You are a friendly interviewer. Address the caller by their preferred name ({session.get('preferred_name')}) "
-            f"if they have one, otherwise use their first name ({session.get('first_name')}). "
-            "Ask one question at a time and never mention you're an AI. "
-            "When done, say 'Thank you, that's all I need today.' and hang up."
-        )
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": "\n".join(conversation_log)}
-        ]
-        chat = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            temperature=0.7
+        with stage_timer('continuation_wait', call_sid, qid):
+            result = run_async(continue_reply(call_sid), timeout=TURN_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        print("Streamed reply timed out after", TURN_TIMEOUT, "seconds")
+        return Response(
+            static_twiml("I'm having technical difficulties. Please try again in a moment."),
+            mimetype='text/xml'
         )
-        next_line = chat.choices[0].message.content.strip()
     except Exception as e:
         traceback.print_exc()
         print("Error during GPT analysis:", e)
         return Response(
-            generate_twiml_response("I'm having trouble processing your response. Let's try again."),
+            static_twiml("I'm having trouble processing your response. Let's try again."),
             mimetype='text/xml'
         )
 
+    if result is None:
+        # The stream lives in another process (or already finished); just take the answer.
+        return Response(static_twiml("", record_next=True, qid=qid+1), mimetype='text/xml')
+
+    next_line, rest = result
     print("Next Line:", next_line)
-    
-    if "thank you, that's all i need today" in next_line.lower():
-        session['conversation_complete'] = True
-        return Response(
-            generate_twiml_response(next_line),
-            mimetype='text/xml'
-        )
-    else:
-        return Response(
-            generate_twiml_response(next_line, record_next=True, qid=qid+1),
-            mimetype='text/xml'
-        )
+
+    if is_closing_line(next_line):
+        conversation_store.update(call_sid, conversation_complete=True)
+        finish_conversation(call_sid)
+        return Response(generate_twiml_response(rest), mimetype='text/xml')
+    return Response(generate_twiml_response(rest, record_next=True, qid=qid+1), mimetype='text/xml')
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint for this worker process."""
+    return Response(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/metrics/summary')
+@login_required
+def metrics_summary():
+    return jsonify({
+        'stages': STAGE_LATENCY.summary('stage'),
+        'slos': STAGE_SLOS,
+        'slo_breaches': {labels['stage']: value for _, labels, value in SLO_BREACHES.samples()},
+        'http_pools': http_pool_stats(),
+        'speculation': speculation_stats(),
+        'recent_turns': turn_timings.snapshot()
+    })
 
 @app.route('/api/sheet-search')
 @login_required
 def api_sheet_search():
     try:
-        # Initialize Google Drive API
-        SCOPES = ['https://www.googleapis.com/auth/drive.readonly']
-        SERVICE_ACCOUNT_FILE = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
-        
-        if not SERVICE_ACCOUNT_FILE:
-            return jsonify({'error': 'Google credentials not configured'}), 500
-            
-        credentials = service_account.Credentials.from_service_account_file(
-            SERVICE_ACCOUNT_FILE, scopes=SCOPES)
-        service = build('drive', 'v3', credentials=credentials)
-        
-        # Search for files containing "(Survey) (Responses)"
-        query = "name contains '(Survey) (Responses)' and mimeType='application/vnd.google-apps.spreadsheet'"
-        results = service.files().list(
-            q=query,
-            fields="files(id, name, createdTime, modifiedTime)",
-            orderBy="createdTime"
-        ).execute()
-        
-        files = results.get('files', [])
-        
-        if not files:
-            return jsonify({
-                'total_sheets': 0,
-                'oldest_created': None,
-                'newest_modified': None,
-                'files': []
-            })
-        
-        # Process files
-        processed_files = []
-        oldest_created = None
-        newest_modified = None
-        
-        for file in files:
-            created_time = datetime.fromisoformat(file['createdTime'].replace('Z', '+00:00'))
-            modified_time = datetime.fromisoformat(file['modifiedTime'].replace('Z', '+00:00'))
-            
-            if oldest_created is None or created_time < oldest_created:
-                oldest_created = created_time
-            if newest_modified is None or modified_time > newest_modified:
-                newest_modified = modified_time
-                
-            processed_files.append({
-                'name': file['name'],
-                'created': created_time.strftime('%Y-%m-%d')
-            })
-        
-        return jsonify({
-            'total_sheets': len(files),
-            'oldest_created': oldest_created.strftime('%Y-%m-%d') if oldest_created else None,
-            'newest_modified': newest_modified.strftime('%Y-%m-%d') if newest_modified else None,
-            'files': processed_files
-        })
-        
+        cached = sheet_search_cache.get(
+            request.query_string,
+            lambda: app.json.dumps(sheet_index.payload()).encode()
+        )
+        return cached_json_response(cached)
+    except GoogleNotConfigured as e:
+        return jsonify({'error': str(e)}), 500
     except HttpError as error:
         return jsonify({'error': f'Google API error: {str(error)}'}), 500
     except Exception as e:
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/api/survey-responses/sync', methods=['POST'])
+@login_required
+def api_survey_responses_sync():
+    if not current_user.has_permission('analytics'):
+        return jsonify({'error': 'Permission denied'}), 403
+    try:
+        return jsonify(survey_ingestor.sync())
+    except GoogleNotConfigured as e:
+        return jsonify({'error': str(e)}), 500
+    except HttpError as error:
+        return jsonify({'error': f'Google API error: {str(error)}'}), 500
+    except Exception as e:
+        return jsonify({'error': f'Server error: {str(e)}'}), 500
+
+@app.route('/api/survey-responses/questions')
+@login_required
+def api_survey_questions():
+    if not current_user.has_permission('analytics'):
+        return jsonify({'error': 'Permission denied'}), 403
+    return jsonify({'questions': survey_store.questions()})
+
+@app.route('/api/survey-responses/answers')
+@login_required
+def api_survey_answers():
+    if not current_user.has_permission('analytics'):
+        return jsonify({'error': 'Permission denied'}), 403
+    question = request.args.get('question')
+    if not question:
+        return jsonify({'error': 'question is required'}), 400
+    limit = request.args.get('limit', 100, type=int)
+    return jsonify({'question': question, 'answers': survey_store.answer_counts(question, limit)})
+
 if __name__ == '__main__':
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", 5000)))
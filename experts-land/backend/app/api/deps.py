@@ -1,5 +1,6 @@
-from typing import Generator
+from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 
@@ -7,6 +8,7 @@ from app.core import security
 from app.core.config import settings
 from app.db.session import SessionLocal
 from app.models.user import User
+from app.schemas.token import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
@@ -32,12 +34,19 @@ def get_current_user(
         user = db.query(User).filter(User.id == user_id).first()
         if not user:
             raise HTTPException(status_code=404, detail="User not found")
-        return user
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication credentials",
         )
+    security.remember_token_version(user.id, user.token_version)
+    # Tokens issued before token versions carry no "ver" and stay valid until they expire
+    if payload.get("ver") is not None and payload["ver"] != user.token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+        )
+    return user
 
 def get_current_active_user(
     current_user: User = Depends(get_current_user),
@@ -46,12 +55,73 @@ def get_current_active_user(
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
-def require_admin(
-    current_user: User = Depends(get_current_active_user),
-) -> User:
-    if not current_user.is_admin:
+def _load_principal(user_id: int) -> Optional[TokenPayload]:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if not user:
+            return None
+        return TokenPayload(
+            sub=user.id,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            role=user.role,
+            ver=user.token_version,
+        )
+    finally:
+        db.close()
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> TokenPayload:
+    """
+    The caller's identity and authorization claims, taken from the access token.
+    The users table is only read when the user's token version isn't cached, or for
+    tokens issued without claims.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid authentication credentials",
+    )
+    payload = security.verify_token(token)
+    if payload is None:
+        raise credentials_exception
+    try:
+        claims = TokenPayload(**payload)
+    except ValueError:
+        raise credentials_exception
+    if claims.sub is None:
+        raise credentials_exception
+
+    current_version = security.cached_token_version(claims.sub)
+    # A token newer than the cached version was issued after a revocation this process
+    # hasn't seen yet, so the cache is stale: reload instead of rejecting it.
+    if current_version is None or claims.ver is None or claims.ver > current_version:
+        principal = await run_in_threadpool(_load_principal, claims.sub)
+        if principal is None:
+            raise credentials_exception
+        security.remember_token_version(principal.sub, principal.ver)
+        if claims.ver is None:
+            return principal
+        current_version = principal.ver
+    if claims.ver != current_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token has been revoked",
+        )
+    return claims
+
+async def get_current_active_principal(
+    principal: TokenPayload = Depends(get_current_principal),
+) -> TokenPayload:
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+async def require_admin(
+    principal: TokenPayload = Depends(get_current_active_principal),
+) -> TokenPayload:
+    if not principal.is_admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin privileges required"
         )
-    return current_user 
\ No newline at end of file
+    return principal 
\ No newline at end of file
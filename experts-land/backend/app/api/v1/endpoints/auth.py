@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
@@ -7,17 +8,33 @@ from app.core.config import settings
 from app.api import deps
 from app.models.user import User
 from app.schemas.token import Token
-from app.schemas.user import UserCreate, User
+from app.schemas.user import UserCreate, User as UserSchema
 
 router = APIRouter()
 
+# The auth routes are async so that bcrypt can be awaited on the hashing pool
+# (see app.core.security); their blocking DB calls go to the threadpool instead.
+def _get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+def _revoke_tokens(db: Session, user: User) -> None:
+    user.token_version = (user.token_version or 0) + 1
+    db.commit()
+    security.forget_token_version(user.id)
+
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     db: Session = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(_get_user_by_email, db, form_data.username)
+    if not user or not await security.averify_password(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -26,17 +43,23 @@ def login(
         raise HTTPException(status_code=400, detail="Inactive user")
     
     return {
-        "access_token": security.create_access_token(user.id),
+        "access_token": security.create_access_token(
+            user.id,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            role=user.role,
+            token_version=user.token_version,
+        ),
         "token_type": "bearer",
     }
 
-@router.post("/register", response_model=User)
-def register(
+@router.post("/register", response_model=UserSchema)
+async def register(
     *,
     db: Session = Depends(deps.get_db),
     user_in: UserCreate,
 ):
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await run_in_threadpool(_get_user_by_email, db, user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
@@ -44,14 +67,22 @@ def register(
         )
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.aget_password_hash(user_in.password),
         full_name=user_in.full_name,
     )
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+    return await run_in_threadpool(_save_user, db, user)
 
-@router.get("/me", response_model=User)
+@router.get("/me", response_model=UserSchema)
 def read_user_me(current_user: User = Depends(deps.get_current_active_user)):
-    return current_user 
\ No newline at end of file
+    return current_user
+
+@router.post("/logout-all", status_code=204)
+def logout_all(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_user),
+):
+    """
+    Revoke every access token issued to the current user, including this one.
+    """
+    _revoke_tokens(db, current_user)
+    return Response(status_code=204)
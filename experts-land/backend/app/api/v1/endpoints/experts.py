@@ -1,30 +1,84 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.core.search import SearchIndexNotReady
 from app.crud import expert as crud
-from app.schemas.expert import Expert, ExpertCreate, ExpertUpdate
+from app.schemas.expert import Expert, ExpertCreate, ExpertUpdate, TagCount
+from app.schemas.token import TokenPayload
 
 router = APIRouter()
 
 @router.get("/", response_model=List[Expert])
 def read_experts(
+    response: Response,
     db: Session = Depends(deps.get_db),
     skip: int = 0,
     limit: int = 100,
-    is_active: bool = Query(None, description="Filter by active status")
+    is_active: bool = Query(None, description="Filter by active status"),
+    tag: List[str] = Query([], description="Only experts with all of these expertise tags"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page")
 ):
     """
-    Retrieve experts.
+    Retrieve experts, oldest first.
+
+    Pages are fetched by cursor: the X-Next-Cursor response header holds the cursor
+    for the next page and is absent on the last one. `skip` pages by offset instead,
+    which gets slower the deeper the page.
     """
-    experts = crud.get_experts(db, skip=skip, limit=limit, is_active=is_active)
+    if skip:
+        return crud.get_experts(db, skip=skip, limit=limit, is_active=is_active, tags=tag)
+    try:
+        experts, next_cursor = crud.get_experts_page(
+            db, cursor=cursor, limit=limit, is_active=is_active, tags=tag
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return experts
 
+@router.get("/tags", response_model=List[TagCount])
+def read_tag_counts(
+    db: Session = Depends(deps.get_db),
+    tag: List[str] = Query([], description="Only count experts with all of these expertise tags"),
+    is_active: bool = Query(None, description="Filter by active status"),
+    limit: int = Query(50, ge=1, le=500)
+):
+    """
+    Expertise tags with the number of matching experts carrying each, most common first.
+    """
+    counts = crud.get_tag_counts(db, tags=tag, is_active=is_active, limit=limit)
+    return [{"tag": name, "count": count} for name, count in counts]
+
+@router.get("/search", response_model=List[Expert])
+def search_experts(
+    db: Session = Depends(deps.get_db),
+    q: str = Query("", description="Search terms; partial words and small typos also match"),
+    tag: List[str] = Query([], description="Only experts with all of these expertise tags"),
+    is_active: bool = Query(None, description="Filter by active status"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Search experts by name, expertise and bio, best matches first.
+    """
+    if not q.strip() and not tag:
+        raise HTTPException(status_code=400, detail="Provide a search query or at least one tag")
+    try:
+        return crud.search_experts(db, q, tags=tag, is_active=is_active, limit=limit)
+    except SearchIndexNotReady:
+        raise HTTPException(
+            status_code=503,
+            detail="Search index is still being built",
+            headers={"Retry-After": "5"},
+        )
+
 @router.post("/", response_model=Expert)
 def create_expert(
     *,
     db: Session = Depends(deps.get_db),
+    principal: TokenPayload = Depends(deps.get_current_active_principal),
     expert_in: ExpertCreate
 ):
     """
@@ -56,6 +110,7 @@ def read_expert(
 def update_expert(
     *,
     db: Session = Depends(deps.get_db),
+    principal: TokenPayload = Depends(deps.get_current_active_principal),
     expert_id: int,
     expert_in: ExpertUpdate
 ):
@@ -72,6 +127,7 @@ def update_expert(
 def delete_expert(
     *,
     db: Session = Depends(deps.get_db),
+    principal: TokenPayload = Depends(deps.require_admin),
     expert_id: int,
 ):
     """
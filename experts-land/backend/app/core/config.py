@@ -20,6 +20,22 @@ class Settings(BaseSettings):
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-here")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Password hashing (bcrypt) runs in a process pool of this many workers; at most
+    # PASSWORD_HASH_MAX_PENDING hashes are queued at once, the rest wait their turn.
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 64))
+    # Successful verifications are remembered for this many seconds (0 disables)
+    PASSWORD_VERIFY_CACHE_TTL: int = int(os.getenv("PASSWORD_VERIFY_CACHE_TTL", 0))
+    PASSWORD_VERIFY_CACHE_SIZE: int = 1024
+    # Access tokens carry the user's authorization claims and token version; the current
+    # version per user is cached this many seconds, so most requests skip the users table.
+    TOKEN_VERSION_CACHE_TTL: int = int(os.getenv("TOKEN_VERSION_CACHE_TTL", 60))
+    TOKEN_VERSION_CACHE_SIZE: int = 10000
+    # Without Postgres, each process searches an in-memory index built in the background
+    # at startup; it is rebuilt when the experts table has changed (in any process),
+    # checked every SEARCH_INDEX_REFRESH_INTERVAL seconds.
+    SEARCH_INDEX_REFRESH_INTERVAL: int = int(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", 60))
     
     # CORS
     CORS_ORIGINS: List[str] = [
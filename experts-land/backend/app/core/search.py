@@ -0,0 +1,297 @@
+import bisect
+import math
+import re
+import threading
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Field weights: a term in the name counts more than one in the expertise or bio
+FIELD_WEIGHTS = (("name", 3.0), ("expertise", 2.0), ("bio", 1.0))
+# Score multipliers for a query term matched exactly, as a prefix, or with one typo
+EXACT_BOOST = 1.0
+PREFIX_BOOST = 0.7
+TYPO_BOOST = 0.5
+MIN_PREFIX_LENGTH = 2
+MIN_TYPO_LENGTH = 4
+MAX_EXPANSIONS = 20
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+def split_tags(expertise: Optional[str]) -> Set[str]:
+    """Expertise tags from the free-form expertise string, e.g. "Python, Data Science"."""
+    if not expertise:
+        return set()
+    return {tag.strip().lower() for tag in re.split(r"[,;/|]", expertise) if tag.strip()}
+
+class SearchIndexNotReady(Exception):
+    """Raised by searches made before the index has finished its first build."""
+
+def _deletes(term: str) -> Set[str]:
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by at most one insertion, deletion or substitution."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = j = edits = 0
+    while i < len(a) and j < len(b):
+        if a[i] != b[j]:
+            edits += 1
+            if edits > 1:
+                return False
+            if len(a) == len(b):
+                i += 1
+            j += 1
+        else:
+            i += 1
+            j += 1
+    return edits + (len(b) - j) <= 1
+
+class ExpertSearchIndex:
+    """
+    In-process inverted index over expert names, expertise and bios, for deployments
+    without Postgres full-text search. Every query term must match, exactly, as a
+    prefix of an indexed term, or within one edit; documents are ranked with BM25
+    over field-weighted term frequencies. Tags are kept as a separate posting map.
+
+    Typo candidates come from a deletion neighbourhood map (each term filed under the
+    strings one deletion away from it), so a lookup never scans the vocabulary.
+
+    The index is filled by rebuild(), normally from a background thread; searches
+    raise SearchIndexNotReady until the first build has finished.
+    """
+
+    # Everything rebuild() replaces
+    _STATE = (
+        "_postings", "_doc_terms", "_doc_lengths", "_total_length", "_terms",
+        "_deletion_map", "_tags", "_doc_tags", "_active",
+    )
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rebuild_lock = threading.Lock()
+        self.loaded = False
+        # Whatever rebuild() was given to describe the rows it indexed
+        self.watermark: Any = None
+        # add/remove calls made while a rebuild is running, replayed onto the new index
+        self._replay: Optional[List[Tuple[str, tuple, dict]]] = None
+        self._terms_sorted = True
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._doc_terms: Dict[int, Dict[str, float]] = {}
+        self._doc_lengths: Dict[int, float] = {}
+        self._total_length = 0.0
+        self._terms: List[str] = []  # sorted vocabulary, for prefix lookups
+        self._deletion_map: Dict[str, Set[str]] = defaultdict(set)
+        self._tags: Dict[str, Set[int]] = defaultdict(set)
+        self._doc_tags: Dict[int, Set[str]] = {}
+        self._active: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._doc_terms)
+
+    @property
+    def in_use(self) -> bool:
+        """True once a build has started, from then on writes must be applied to the index."""
+        return self.loaded or self._replay is not None
+
+    def rebuild(self, rows: Iterable[Tuple], watermark: Any = None) -> None:
+        """
+        Replace the index with one built from (id, name, expertise, bio, is_active) rows.
+        The new index is built to the side without holding the lock, so searches keep
+        using the current one; add/remove calls made meanwhile are replayed onto it
+        before it is swapped in.
+        """
+        with self._rebuild_lock:
+            with self._lock:
+                self._replay = []
+            try:
+                fresh = ExpertSearchIndex()
+                # Bulk load: collect the vocabulary unsorted and sort it once at the end
+                fresh._terms_sorted = False
+                for id, name, expertise, bio, is_active in rows:
+                    fresh.add(id, name=name, expertise=expertise, bio=bio, is_active=is_active)
+                fresh._terms.sort()
+                fresh._terms_sorted = True
+                with self._lock:
+                    for method, args, kwargs in self._replay:
+                        getattr(fresh, method)(*args, **kwargs)
+                    for name in self._STATE:
+                        setattr(self, name, getattr(fresh, name))
+                    self.watermark = watermark
+                    self.loaded = True
+            finally:
+                with self._lock:
+                    self._replay = None
+
+    def _add_term(self, term: str) -> None:
+        if self._terms_sorted:
+            bisect.insort(self._terms, term)
+        else:
+            self._terms.append(term)
+        for deleted in _deletes(term):
+            self._deletion_map[deleted].add(term)
+
+    def _drop_term(self, term: str) -> None:
+        del self._postings[term]
+        if self._terms_sorted:
+            del self._terms[bisect.bisect_left(self._terms, term)]
+        else:
+            self._terms.remove(term)
+        for deleted in _deletes(term):
+            self._deletion_map[deleted].discard(term)
+            if not self._deletion_map[deleted]:
+                del self._deletion_map[deleted]
+
+    def add(
+        self,
+        id: int,
+        *,
+        name: Optional[str],
+        expertise: Optional[str],
+        bio: Optional[str],
+        is_active: bool = True,
+        tags: Optional[Iterable[str]] = None,
+    ) -> None:
+        """Index (or re-index) one expert. Tags default to those in the expertise string."""
+        fields = {"name": name, "expertise": expertise, "bio": bio}
+        frequencies: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS:
+            for term in tokenize(fields[field]):
+                frequencies[term] += weight
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("add", (id,), dict(
+                    name=name, expertise=expertise, bio=bio, is_active=is_active, tags=tags
+                )))
+            self._remove(id)
+            for term, frequency in frequencies.items():
+                if term not in self._postings:
+                    self._add_term(term)
+                self._postings[term][id] = frequency
+            self._doc_terms[id] = dict(frequencies)
+            length = sum(frequencies.values())
+            self._doc_lengths[id] = length
+            self._total_length += length
+            doc_tags = set(tags) if tags is not None else split_tags(expertise)
+            for tag in doc_tags:
+                self._tags[tag].add(id)
+            self._doc_tags[id] = doc_tags
+            if is_active:
+                self._active.add(id)
+
+    def remove(self, id: int) -> None:
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(("remove", (id,), {}))
+            self._remove(id)
+
+    def _remove(self, id: int) -> None:
+        # Caller holds the lock
+        frequencies = self._doc_terms.pop(id, None)
+        if frequencies is None:
+            return
+        for term in frequencies:
+            postings = self._postings[term]
+            postings.pop(id, None)
+            if not postings:
+                self._drop_term(term)
+        self._total_length -= self._doc_lengths.pop(id)
+        for tag in self._doc_tags.pop(id, ()):
+            self._tags[tag].discard(id)
+            if not self._tags[tag]:
+                del self._tags[tag]
+        self._active.discard(id)
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        """Indexed terms matching a query term, with their score multiplier."""
+        matches = {}
+        if term in self._postings:
+            matches[term] = EXACT_BOOST
+        if len(term) >= MIN_PREFIX_LENGTH:
+            start = bisect.bisect_left(self._terms, term)
+            for candidate in self._terms[start:start + MAX_EXPANSIONS]:
+                if not candidate.startswith(term):
+                    break
+                matches.setdefault(candidate, PREFIX_BOOST)
+        if len(term) >= MIN_TYPO_LENGTH:
+            candidates = set(self._deletion_map.get(term, ()))
+            for deleted in _deletes(term):
+                if deleted in self._postings:
+                    candidates.add(deleted)
+                candidates |= self._deletion_map.get(deleted, set())
+            for candidate in candidates:
+                if candidate not in matches and _within_one_edit(term, candidate):
+                    matches[candidate] = TYPO_BOOST
+        return list(matches.items())
+
+    def search(
+        self,
+        query: str,
+        *,
+        tags: Iterable[str] = (),
+        is_active: Optional[bool] = None,
+        limit: int = 20,
+    ) -> List[Tuple[int, float]]:
+        """(expert id, score) pairs, best first. A blank query lists the tag matches."""
+        terms = tokenize(query)
+        with self._lock:
+            if not self.loaded:
+                raise SearchIndexNotReady()
+            candidates: Optional[Set[int]] = None
+            for tag in {t.strip().lower() for t in tags if t.strip()}:
+                tagged = self._tags.get(tag, set())
+                candidates = set(tagged) if candidates is None else candidates & tagged
+                if not candidates:
+                    return []
+
+            document_count = len(self._doc_terms) or 1
+            average_length = (self._total_length / document_count) or 1.0
+            # BM25 length normalisation, split into a constant and a per-length factor
+            norm_base = BM25_K1 * (1 - BM25_B)
+            norm_scale = BM25_K1 * BM25_B / average_length
+            doc_lengths = self._doc_lengths
+            active = self._active
+            scores: Optional[Dict[int, float]] = None
+            for term in terms:
+                term_scores: Dict[int, float] = {}
+                for matched, boost in self._expand(term):
+                    postings = self._postings[matched]
+                    idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    weight = boost * idf * (BM25_K1 + 1)
+                    # After the first term only documents already matching can still match
+                    if scores is not None and len(scores) < len(postings):
+                        entries = ((id, postings[id]) for id in scores if id in postings)
+                    else:
+                        entries = postings.items()
+                    for id, frequency in entries:
+                        if candidates is not None and id not in candidates:
+                            continue
+                        if is_active is not None and (id in active) != is_active:
+                            continue
+                        score = weight * frequency / (frequency + norm_base + norm_scale * doc_lengths[id])
+                        # A term matching several indexed terms counts its best match
+                        if score > term_scores.get(id, 0.0):
+                            term_scores[id] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {id: s + term_scores[id] for id, s in scores.items() if id in term_scores}
+                if not scores:
+                    return []
+            if scores is None:
+                # Tag filter only
+                matches = sorted(
+                    id for id in candidates or ()
+                    if is_active is None or (id in self._active) == is_active
+                )
+                return [(id, 0.0) for id in matches[:limit]]
+            return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+expert_index = ExpertSearchIndex()
@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
@@ -12,9 +18,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
-def create_access_token(user_id: int) -> str:
+# bcrypt is CPU-bound for 100-300 ms, so the async variants below run it in a dedicated
+# process pool instead of the request threadpool. The pool and the pending-hash limit
+# are created lazily in the process that serves requests.
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_slots: Optional[asyncio.Semaphore] = None
+
+# Recent successful verifications: HMAC(hash, password) -> expiry. Keyed by the stored
+# hash, so a password change never matches an old entry. Only touched on the event loop.
+_verified: "OrderedDict[str, float]" = OrderedDict()
+
+def _hash_executor() -> ProcessPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+    return _hash_pool
+
+async def _run_hash(fn, *args):
+    global _hash_slots
+    if _hash_slots is None:
+        _hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+    async with _hash_slots:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor(), fn, *args)
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(cancel_futures=True)
+        _hash_pool = None
+
+def _verification_key(plain_password: str, hashed_password: str) -> str:
+    message = f"{hashed_password}\0{plain_password}".encode()
+    return hmac.new(settings.SECRET_KEY.encode(), message, hashlib.sha256).hexdigest()
+
+async def averify_password(plain_password: str, hashed_password: str) -> bool:
+    ttl = settings.PASSWORD_VERIFY_CACHE_TTL
+    key = _verification_key(plain_password, hashed_password) if ttl > 0 else None
+    if key is not None:
+        expires = _verified.get(key)
+        if expires is not None and expires > time.monotonic():
+            return True
+    verified = await _run_hash(verify_password, plain_password, hashed_password)
+    if verified and key is not None:
+        _verified[key] = time.monotonic() + ttl
+        _verified.move_to_end(key)
+        while len(_verified) > settings.PASSWORD_VERIFY_CACHE_SIZE:
+            _verified.popitem(last=False)
+    return verified
+
+async def aget_password_hash(password: str) -> str:
+    return await _run_hash(get_password_hash, password)
+
+def create_access_token(
+    user_id: int,
+    *,
+    is_active: bool = True,
+    is_admin: bool = False,
+    role: str = "user",
+    token_version: int = 0,
+) -> str:
     expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"exp": expire, "sub": str(user_id)}
+    to_encode = {
+        "exp": expire,
+        "sub": str(user_id),
+        "is_active": is_active,
+        "is_admin": is_admin,
+        "role": role,
+        "ver": token_version,
+    }
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
 
 def verify_token(token: str) -> Optional[dict]:
@@ -22,4 +94,29 @@ def verify_token(token: str) -> Optional[dict]:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         return payload
     except JWTError:
-        return None 
\ No newline at end of file
+        return None
+
+# Current token version per user id -> (version, expiry). A token whose "ver" claim is
+# older than the user's token_version has been revoked. Entries expire after
+# TOKEN_VERSION_CACHE_TTL, which bounds how long another worker process can accept a
+# revoked token; in this process forget_token_version applies a revocation at once.
+_token_versions: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+
+def cached_token_version(user_id: int) -> Optional[int]:
+    entry = _token_versions.get(user_id)
+    if entry is None:
+        return None
+    version, expires = entry
+    if expires <= time.monotonic():
+        _token_versions.pop(user_id, None)
+        return None
+    return version
+
+def remember_token_version(user_id: int, version: int) -> None:
+    _token_versions[user_id] = (version, time.monotonic() + settings.TOKEN_VERSION_CACHE_TTL)
+    _token_versions.move_to_end(user_id)
+    while len(_token_versions) > settings.TOKEN_VERSION_CACHE_SIZE:
+        _token_versions.popitem(last=False)
+
+def forget_token_version(user_id: int) -> None:
+    _token_versions.pop(user_id, None)
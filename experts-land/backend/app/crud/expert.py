@@ -1,6 +1,14 @@
-from typing import List, Optional
+import logging
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.core.search import expert_index, split_tags, tokenize
+from app.crud.base import keyset_page
+from app.db.search import EXPERT_SEARCH_VECTOR
 from app.models.expert import Expert
+from app.models.expertise_tag import ExpertiseTag, expert_expertise_tags
 from app.schemas.expert import ExpertCreate, ExpertUpdate
 
 def get_expert(db: Session, expert_id: int) -> Optional[Expert]:
@@ -9,22 +17,130 @@ def get_expert(db: Session, expert_id: int) -> Optional[Expert]:
 def get_expert_by_email(db: Session, email: str) -> Optional[Expert]:
     return db.query(Expert).filter(Expert.email == email).first()
 
+# Expertise tags
+# Tags are normalized from the free-form expertise string whenever an expert is
+# written. Tag filters select the experts holding every requested tag from the
+# association table's (tag_id, expert_id) index instead of scanning expertise.
+def _normalize_tags(tags: Iterable[str]) -> List[str]:
+    return sorted({tag.strip().lower() for tag in tags if tag.strip()})
+
+def _get_or_create_tags(db: Session, names: Iterable[str]) -> List[ExpertiseTag]:
+    names = set(names)
+    if not names:
+        return []
+    tags = {tag.name: tag for tag in db.query(ExpertiseTag).filter(ExpertiseTag.name.in_(names))}
+    for name in sorted(names - tags.keys()):
+        # Each new tag is inserted in its own savepoint: if a concurrent request inserted
+        # the same name since the select above, only that insert is rolled back and the
+        # other request's row is used instead.
+        savepoint = db.begin_nested()
+        tag = ExpertiseTag(name=name)
+        db.add(tag)
+        try:
+            savepoint.commit()
+        except IntegrityError:
+            savepoint.rollback()
+            tag = db.query(ExpertiseTag).filter(ExpertiseTag.name == name).first()
+            if tag is None:
+                raise
+        tags[name] = tag
+    return [tags[name] for name in sorted(names)]
+
+def sync_expert_tags(db: Session, db_expert: Expert) -> None:
+    db_expert.tags = _get_or_create_tags(db, split_tags(db_expert.expertise))
+
+def _with_tags(query, tags: Sequence[str]):
+    """Restrict a query over Expert to experts carrying every tag in `tags`."""
+    if not tags:
+        return query
+    tagged = (
+        select(expert_expertise_tags.c.expert_id)
+        .join(ExpertiseTag, ExpertiseTag.id == expert_expertise_tags.c.tag_id)
+        .where(ExpertiseTag.name.in_(tags))
+        .group_by(expert_expertise_tags.c.expert_id)
+        .having(func.count() == len(tags))
+    )
+    return query.filter(Expert.id.in_(tagged))
+
+def get_tag_counts(
+    db: Session,
+    tags: Sequence[str] = (),
+    is_active: Optional[bool] = None,
+    limit: int = 50
+) -> List[Tuple[str, int]]:
+    """(tag, number of experts) among the experts matching the filters, most common first."""
+    tags = _normalize_tags(tags)
+    query = (
+        db.query(ExpertiseTag.name, func.count(expert_expertise_tags.c.expert_id).label("experts"))
+        .join(expert_expertise_tags, ExpertiseTag.id == expert_expertise_tags.c.tag_id)
+    )
+    if tags or is_active is not None:
+        experts = _with_tags(select(Expert.id), tags)
+        if is_active is not None:
+            experts = experts.filter(Expert.is_active == is_active)
+        query = query.filter(expert_expertise_tags.c.expert_id.in_(experts))
+    return (
+        query.group_by(ExpertiseTag.name)
+        .order_by(func.count(expert_expertise_tags.c.expert_id).desc(), ExpertiseTag.name)
+        .limit(limit)
+        .all()
+    )
+
+def backfill_expertise_tags(db: Session, batch_size: int = 1000) -> int:
+    """
+    Give tags to experts that have an expertise string but no tags yet, e.g. rows
+    written before tags existed. Safe to run repeatedly; returns the experts updated.
+    Run once per database by the 0001 migration (`alembic upgrade head`).
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Expert)
+            .filter(Expert.id > last_id, Expert.expertise.isnot(None), ~Expert.tags.any())
+            .order_by(Expert.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return updated
+        for db_expert in batch:
+            sync_expert_tags(db, db_expert)
+            updated += bool(db_expert.tags)
+        db.commit()
+        last_id = batch[-1].id
+
 def get_experts(
     db: Session, 
     skip: int = 0, 
     limit: int = 100,
-    is_active: Optional[bool] = None
+    is_active: Optional[bool] = None,
+    tags: Sequence[str] = ()
 ) -> List[Expert]:
-    query = db.query(Expert)
+    query = _with_tags(db.query(Expert), _normalize_tags(tags))
     if is_active is not None:
         query = query.filter(Expert.is_active == is_active)
-    return query.offset(skip).limit(limit).all()
+    return query.order_by(Expert.created_at, Expert.id).offset(skip).limit(limit).all()
+
+def get_experts_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 100,
+    is_active: Optional[bool] = None,
+    tags: Sequence[str] = ()
+) -> Tuple[List[Expert], Optional[str]]:
+    query = _with_tags(db.query(Expert), _normalize_tags(tags))
+    if is_active is not None:
+        query = query.filter(Expert.is_active == is_active)
+    return keyset_page(query, Expert, cursor=cursor, limit=limit)
 
 def create_expert(db: Session, expert: ExpertCreate) -> Expert:
     db_expert = Expert(**expert.model_dump())
+    sync_expert_tags(db, db_expert)
     db.add(db_expert)
     db.commit()
     db.refresh(db_expert)
+    _index_expert(db_expert)
     return db_expert
 
 def update_expert(
@@ -37,8 +153,11 @@ def update_expert(
         update_data = expert.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(db_expert, key, value)
+        if "expertise" in update_data:
+            sync_expert_tags(db, db_expert)
         db.commit()
         db.refresh(db_expert)
+        _index_expert(db_expert)
     return db_expert
 
 def delete_expert(db: Session, expert_id: int) -> Optional[Expert]:
@@ -46,4 +165,106 @@ def delete_expert(db: Session, expert_id: int) -> Optional[Expert]:
     if db_expert:
         db.delete(db_expert)
         db.commit()
-    return db_expert 
\ No newline at end of file
+        if expert_index.in_use:
+            expert_index.remove(expert_id)
+    return db_expert
+
+# Search
+# Postgres deployments search with full-text queries on the ix_experts_search GIN index.
+# Elsewhere (SQLite) each process keeps an in-memory index. keep_search_index_fresh
+# builds it in the background at startup and rebuilds it whenever the table's
+# watermark (row count and latest updated_at) moves, which picks up writes made by
+# other processes; writes through this process are applied to it at once as well.
+logger = logging.getLogger(__name__)
+_has_trigram: Optional[bool] = None
+
+def _index_expert(db_expert: Expert) -> None:
+    if expert_index.in_use:
+        expert_index.add(
+            db_expert.id,
+            name=db_expert.name,
+            expertise=db_expert.expertise,
+            bio=db_expert.bio,
+            is_active=db_expert.is_active,
+            tags=[tag.name for tag in db_expert.tags],
+        )
+
+def refresh_search_index(db: Session) -> bool:
+    """Rebuild the in-memory search index if experts changed since it was built."""
+    watermark = tuple(db.query(func.count(Expert.id), func.max(Expert.updated_at)).one())
+    if expert_index.loaded and watermark == expert_index.watermark:
+        return False
+    expert_index.rebuild(
+        db.query(Expert.id, Expert.name, Expert.expertise, Expert.bio, Expert.is_active).yield_per(1000),
+        watermark=watermark,
+    )
+    return True
+
+def keep_search_index_fresh(
+    session_factory: Callable[[], Session], stop: threading.Event, interval: float
+) -> None:
+    """Build the search index, then refresh it every `interval` seconds until `stop` is set."""
+    while True:
+        try:
+            with session_factory() as db:
+                refresh_search_index(db)
+        except Exception:
+            logger.exception("Refreshing the expert search index failed")
+        if stop.wait(interval):
+            return
+
+def _trigram_available(db: Session) -> bool:
+    global _has_trigram
+    if _has_trigram is None:
+        _has_trigram = db.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first() is not None
+    return _has_trigram
+
+def _search_postgres(
+    db: Session, terms: List[str], tags: Sequence[str], is_active: Optional[bool], limit: int
+) -> List[Expert]:
+    query = _with_tags(db.query(Expert), tags)
+    if is_active is not None:
+        query = query.filter(Expert.is_active == is_active)
+    if not terms:
+        return query.order_by(Expert.created_at, Expert.id).limit(limit).all()
+
+    vector = literal_column(f"({EXPERT_SEARCH_VECTOR})")
+    # Every term must match, each as a prefix; terms are \w+ so they cannot break the tsquery syntax
+    tsquery = func.to_tsquery("english", " & ".join(f"{term}:*" for term in terms))
+    experts = (
+        query.filter(vector.op("@@")(tsquery))
+        .order_by(func.ts_rank_cd(vector, tsquery).desc(), Expert.id)
+        .limit(limit)
+        .all()
+    )
+    if experts or not _trigram_available(db):
+        return experts
+    # Nothing matched as typed: fall back to trigram similarity on the name
+    phrase = " ".join(terms)
+    return (
+        query.filter(Expert.name.op("%")(phrase))
+        .order_by(func.similarity(Expert.name, phrase).desc(), Expert.id)
+        .limit(limit)
+        .all()
+    )
+
+def search_experts(
+    db: Session,
+    q: str,
+    tags: Sequence[str] = (),
+    is_active: Optional[bool] = None,
+    limit: int = 20
+) -> List[Expert]:
+    terms = tokenize(q)
+    tags = _normalize_tags(tags)
+    if db.bind.dialect.name == "postgresql":
+        return _search_postgres(db, terms, tags, is_active, limit)
+
+    # Raises SearchIndexNotReady until keep_search_index_fresh has built the index
+    hits = expert_index.search(q, tags=tags, is_active=is_active, limit=limit)
+    if not hits:
+        return []
+    experts = {e.id: e for e in db.query(Expert).filter(Expert.id.in_([id for id, _ in hits]))}
+    return [experts[id] for id, _ in hits if id in experts] 
\ No newline at end of file
@@ -1,11 +1,13 @@
 from typing import Any, Dict, Optional, Union
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import forget_token_version, get_password_hash, verify_password
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
+REVOKING_FIELDS = ("hashed_password", "is_active", "is_admin", "role")
+
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         return db.query(User).filter(User.email == email).first()
@@ -34,7 +36,17 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             hashed_password = get_password_hash(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return super().update(db, db_obj=db_obj, obj_in=update_data)
+        # Tokens carry these as claims, so changing any of them revokes existing tokens
+        revoke = any(
+            field in update_data and update_data[field] != getattr(db_obj, field)
+            for field in REVOKING_FIELDS
+        )
+        if revoke:
+            update_data["token_version"] = (db_obj.token_version or 0) + 1
+        user = super().update(db, db_obj=db_obj, obj_in=update_data)
+        if revoke:
+            forget_token_version(user.id)
+        return user
 
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
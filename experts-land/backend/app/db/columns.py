@@ -0,0 +1,25 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+def _has_column(engine: Engine, table: str, column: str) -> bool:
+    return column in {c["name"] for c in inspect(engine).get_columns(table)}
+
+def ensure_token_version_column(engine: Engine) -> None:
+    """
+    Add users.token_version to a users table created before access tokens carried a
+    token version; create_all leaves existing tables alone, and every User query
+    selects the column. Existing users start at version 0, like their tokens.
+    """
+    if _has_column(engine, "users", "token_version"):
+        return
+    # Postgres can skip the column if another worker added it meanwhile; SQLite can't
+    if_not_exists = "IF NOT EXISTS " if engine.dialect.name == "postgresql" else ""
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(
+                f"ALTER TABLE users ADD COLUMN {if_not_exists}token_version INTEGER NOT NULL DEFAULT 0"
+            ))
+    except SQLAlchemyError:
+        if not _has_column(engine, "users", "token_version"):
+            raise
@@ -0,0 +1,13 @@
+from sqlalchemy.engine import Engine
+
+from app.models.expert import Expert
+
+def ensure_keyset_indexes(engine: Engine) -> None:
+    """
+    Create any missing index declared on experts, notably the (created_at, id) ones
+    behind keyset pagination. create_all only adds indexes together with a new table,
+    so an experts table that predates them would otherwise sort on every page.
+    """
+    with engine.begin() as conn:
+        for index in Expert.__table__.indexes:
+            index.create(conn, checkfirst=True)
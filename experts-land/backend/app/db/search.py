@@ -0,0 +1,33 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+# Weighted document vector for expert search on Postgres. ix_experts_search is built on
+# this exact expression, so queries must use it verbatim for the GIN index to apply.
+EXPERT_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(expertise, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(bio, '')), 'C')"
+)
+
+def ensure_search_indexes(engine: Engine) -> None:
+    """
+    Create the Postgres indexes behind expert search; other databases use the
+    in-process index in app.core.search instead. The trigram index for typo-tolerant
+    name matches needs the pg_trgm extension, so it is skipped when that can't be
+    installed.
+    """
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_experts_search ON experts USING gin (({EXPERT_SEARCH_VECTOR}))"
+        ))
+    try:
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_experts_name_trgm ON experts USING gin (name gin_trgm_ops)"
+            ))
+    except SQLAlchemyError:
+        pass
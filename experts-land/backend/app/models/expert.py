@@ -1,8 +1,15 @@
-from sqlalchemy import Column, String, Text, Boolean
+from sqlalchemy import Column, String, Text, Boolean, Index
+from sqlalchemy.orm import relationship
 from app.db.base import BaseModel
+from app.models.expertise_tag import ExpertiseTag, expert_expertise_tags
 
 class Expert(BaseModel):
     __tablename__ = "experts"
+    __table_args__ = (
+        # Keyset pagination order, unfiltered and filtered by is_active
+        Index("ix_experts_created_at_id", "created_at", "id"),
+        Index("ix_experts_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
 
     name = Column(String(100), nullable=False)
     email = Column(String(100), unique=True, nullable=False)
@@ -12,4 +19,12 @@ class Expert(BaseModel):
     profile_picture = Column(String(255))
     linkedin_url = Column(String(255))
     github_url = Column(String(255))
-    website_url = Column(String(255)) 
\ No newline at end of file
+    website_url = Column(String(255))
+
+    # Normalized from `expertise` by crud.expert; expertise stays the editable source
+    tags = relationship(
+        ExpertiseTag,
+        secondary=expert_expertise_tags,
+        lazy="selectin",
+        order_by=ExpertiseTag.name,
+    ) 
\ No newline at end of file
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, ForeignKey, Index, Integer, String, Table
+from app.db.base import Base, BaseModel
+
+# Which experts carry which tag. The primary key serves expert -> tags lookups and
+# ix_expert_expertise_tags_tag_expert serves tag -> experts, so "tag X and tag Y" is
+# answered by intersecting two index ranges.
+expert_expertise_tags = Table(
+    "expert_expertise_tags",
+    Base.metadata,
+    Column("expert_id", Integer, ForeignKey("experts.id", ondelete="CASCADE"), primary_key=True),
+    Column("tag_id", Integer, ForeignKey("expertise_tags.id", ondelete="CASCADE"), primary_key=True),
+    Index("ix_expert_expertise_tags_tag_expert", "tag_id", "expert_id"),
+)
+
+class ExpertiseTag(BaseModel):
+    __tablename__ = "expertise_tags"
+
+    # Normalized (lower-cased, trimmed) tag, see app.core.search.split_tags
+    name = Column(String(100), unique=True, index=True, nullable=False)
+
+    def __repr__(self):
+        return f"<ExpertiseTag {self.name}>"
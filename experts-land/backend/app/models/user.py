@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean
+from sqlalchemy import Column, String, Boolean, Integer
 from app.db.base import BaseModel
 
 class User(BaseModel):
@@ -10,6 +10,8 @@ class User(BaseModel):
     is_active = Column(Boolean, default=True)
     is_admin = Column(Boolean, default=False)
     role = Column(String(20), default="user")  # 'admin', 'user', 'manager'
+    # Bumped whenever is_active/is_admin/role/password change; revokes older tokens
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     def __repr__(self):
         return f"<User {self.email}>" 
\ No newline at end of file
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, HttpUrl
-from typing import Optional
+from pydantic import BaseModel, EmailStr, HttpUrl, field_validator
+from typing import Any, List, Optional
 from datetime import datetime
 
 class ExpertBase(BaseModel):
@@ -22,11 +22,21 @@ class ExpertUpdate(ExpertBase):
 class ExpertInDB(ExpertBase):
     id: int
     is_active: bool
+    tags: List[str] = []
     created_at: datetime
     updated_at: datetime
 
+    @field_validator("tags", mode="before")
+    @classmethod
+    def tag_names(cls, value: Any) -> Any:
+        return [getattr(tag, "name", tag) for tag in value or []]
+
     class Config:
         from_attributes = True
 
 class Expert(ExpertInDB):
-    pass 
\ No newline at end of file
+    pass 
+
+class TagCount(BaseModel):
+    tag: str
+    count: int
@@ -5,4 +5,8 @@ class Token(BaseModel):
     token_type: str
 
 class TokenPayload(BaseModel):
-    sub: int | None = None 
\ No newline at end of file
+    sub: int | None = None
+    is_active: bool = True
+    is_admin: bool = False
+    role: str = "user"
+    ver: int | None = None 
\ No newline at end of file
@@ -1,20 +1,39 @@
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
+from app.core import security
 from app.core.config import settings
 from app.api.v1.api import api_router
-from app.db.session import engine
+from app.crud.expert import keep_search_index_fresh
+from app.db.columns import ensure_token_version_column
+from app.db.indexes import ensure_keyset_indexes
+from app.db.search import ensure_search_indexes
+from app.db.session import SessionLocal, engine
 from app.db.base import Base
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     Base.metadata.create_all(bind=engine)
+    ensure_token_version_column(engine)
+    ensure_keyset_indexes(engine)
+    ensure_search_indexes(engine)
+    # Without Postgres full-text search, build the in-memory search index in the background
+    stop_search_index = threading.Event()
+    if engine.dialect.name != "postgresql":
+        threading.Thread(
+            target=keep_search_index_fresh,
+            args=(SessionLocal, stop_search_index, settings.SEARCH_INDEX_REFRESH_INTERVAL),
+            name="search-index",
+            daemon=True,
+        ).start()
     yield
     # Shutdown
-    # Add any cleanup here
+    stop_search_index.set()
+    security.shutdown_hash_pool()
 
 app = FastAPI(
     title="Experts Land API",
@@ -30,6 +49,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # The experts listing returns its next-page cursor in this header
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Include API router
@@ -0,0 +1,29 @@
+"""Backfill expertise tags from the free-form expertise strings
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+from sqlalchemy.orm import Session
+
+from app.crud.expert import backfill_expertise_tags
+from app.models.expertise_tag import ExpertiseTag, expert_expertise_tags
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # The app creates these tables at startup too; the migration may run first
+    ExpertiseTag.__table__.create(bind, checkfirst=True)
+    expert_expertise_tags.create(bind, checkfirst=True)
+    # The session joins the migration's transaction; its commits don't end it
+    with Session(bind=bind) as db:
+        backfill_expertise_tags(db)
+
+def downgrade() -> None:
+    op.execute(expert_expertise_tags.delete())
+    op.execute(ExpertiseTag.__table__.delete())
@@ -0,0 +1,73 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api import deps
+from app.api.v1.endpoints import auth, experts
+from app.core import security
+from app.db.base import Base
+from app.models.user import User
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine, monkeypatch):
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(deps, "SessionLocal", factory)
+    return factory
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def client(session_factory):
+    # main.py's api_router isn't importable on its own, so mount the routers directly
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    app.include_router(experts.router, prefix="/experts")
+    with TestClient(app) as client:
+        yield client
+    security._token_versions.clear()
+
+
+@pytest.fixture
+def statements(engine):
+    """SQL statements run against the engine, as a list that tests can clear."""
+    executed = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: executed.append(statement))
+    return executed
+
+
+def make_user(db, **fields) -> User:
+    user = User(email=fields.pop("email", "user@example.com"), hashed_password="unused", **fields)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def bearer(user: User) -> dict:
+    token = security.create_access_token(
+        user.id,
+        is_active=user.is_active,
+        is_admin=user.is_admin,
+        role=user.role,
+        token_version=user.token_version,
+    )
+    return {"Authorization": f"Bearer {token}"}
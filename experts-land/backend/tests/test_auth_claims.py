@@ -0,0 +1,53 @@
+from conftest import bearer, make_user
+
+EXPERT = {"name": "Ada Lovelace", "email": "ada@example.com", "expertise": "Mathematics"}
+
+
+def _user_queries(statements):
+    return [s for s in statements if "FROM users" in s]
+
+
+def test_expert_writes_require_a_token(client):
+    assert client.post("/experts/", json=EXPERT).status_code == 401
+
+
+def test_claims_authorize_without_reading_users(client, db, statements):
+    headers = bearer(make_user(db))
+    assert client.post("/experts/", json=EXPERT, headers=headers).status_code == 200
+    statements.clear()
+    response = client.put("/experts/1", json={"bio": "Analyst"}, headers=headers)
+    assert response.status_code == 200
+    assert _user_queries(statements) == []
+
+
+def test_delete_requires_admin_claim(client, db):
+    user = make_user(db)
+    admin = make_user(db, email="admin@example.com", is_admin=True)
+    client.post("/experts/", json=EXPERT, headers=bearer(user))
+    assert client.delete("/experts/1", headers=bearer(user)).status_code == 403
+    assert client.delete("/experts/1", headers=bearer(admin)).status_code == 200
+
+
+def test_logout_all_revokes_earlier_tokens(client, db):
+    user = make_user(db)
+    old = bearer(user)
+    assert client.post("/experts/", json=EXPERT, headers=old).status_code == 200
+    assert client.post("/auth/logout-all", headers=old).status_code == 204
+
+    assert client.put("/experts/1", json={"bio": "x"}, headers=old).status_code == 401
+    assert client.get("/auth/me", headers=old).status_code == 401
+    db.refresh(user)
+    new = bearer(user)
+    assert client.put("/experts/1", json={"bio": "x"}, headers=new).status_code == 200
+    assert client.get("/auth/me", headers=new).status_code == 200
+
+
+def test_newer_token_than_cached_version_is_reloaded(client, db):
+    user = make_user(db)
+    old = bearer(user)
+    client.post("/experts/", json=EXPERT, headers=old)
+    # Another worker revokes: the database moves on, this process still caches version 0
+    user.token_version = 1
+    db.commit()
+    assert client.put("/experts/1", json={"bio": "x"}, headers=bearer(user)).status_code == 200
+    assert client.put("/experts/1", json={"bio": "y"}, headers=old).status_code == 401
@@ -0,0 +1,110 @@
+"""Offset vs keyset pagination of the experts listing on a local SQLite fixture.
+
+The tests check that both modes return the same pages and that keyset pages come
+from the (created_at, id) index. For timings over a large table, run it as a script
+from experts-land/backend:
+
+    python tests/test_pagination_benchmark.py [rows] [page_size]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import sessionmaker
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.crud import expert as crud  # noqa: E402
+from app.crud.base import decode_cursor, encode_cursor  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.models.expert import Expert  # noqa: E402
+
+
+def fill(engine, rows, batch=50_000):
+    start = datetime(2020, 1, 1)
+    with engine.begin() as conn:
+        for first in range(0, rows, batch):
+            conn.execute(insert(Expert), [
+                {"name": f"Expert {i}", "email": f"expert{i}@example.com",
+                 "expertise": "Python", "is_active": i % 10 != 0,
+                 # Several experts share a timestamp, as with a bulk import
+                 "created_at": start + timedelta(seconds=i // 3), "updated_at": start}
+                for i in range(first, min(first + batch, rows))
+            ])
+
+
+def fixture_session(rows):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    fill(engine, rows)
+    return sessionmaker(bind=engine)()
+
+
+def offset_page(db, page, page_size):
+    return crud.get_experts(db, skip=page * page_size, limit=page_size)
+
+
+def keyset_pages(db, page_size, is_active=None):
+    cursor = None
+    while True:
+        experts, cursor = crud.get_experts_page(db, cursor=cursor, limit=page_size, is_active=is_active)
+        yield experts
+        if cursor is None:
+            return
+
+
+def test_keyset_pages_match_offset_pages():
+    db = fixture_session(1_000)
+    for page, experts in enumerate(keyset_pages(db, 70)):
+        assert [e.id for e in experts] == [e.id for e in offset_page(db, page, 70)]
+    assert page == 1_000 // 70
+
+
+def test_keyset_pages_filtered_by_status_cover_every_row_once():
+    db = fixture_session(1_000)
+    ids = [e.id for experts in keyset_pages(db, 64, is_active=True) for e in experts]
+    assert len(ids) == len(set(ids)) == 900
+
+
+def test_keyset_page_is_an_index_range_scan():
+    db = fixture_session(100)
+    _, cursor = crud.get_experts_page(db, limit=10)
+    created_at, id = decode_cursor(cursor)
+    sql = (
+        "EXPLAIN QUERY PLAN SELECT id FROM experts WHERE (created_at, id) > (:created_at, :id) "
+        "ORDER BY created_at, id LIMIT 11"
+    )
+    plan = " ".join(row[-1] for row in db.execute(text(sql), {"created_at": created_at, "id": id}))
+    assert "ix_experts_created_at_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def benchmark(rows, page_size):
+    db = fixture_session(rows)
+    print(f"{rows:,} experts, {page_size} per page (best of 5)")
+    print(f"{'page':>10} {'offset ms':>10} {'keyset ms':>10}")
+    for fraction in (0, 0.1, 0.5, 0.9, 0.999):
+        page = int(rows * fraction) // page_size
+        experts = offset_page(db, page - 1, page_size) if page else []
+        cursor = encode_cursor(experts[-1].created_at, experts[-1].id) if experts else None
+        offset_s = timed(lambda: offset_page(db, page, page_size))
+        keyset_s = timed(lambda: crud.get_experts_page(db, cursor=cursor, limit=page_size))
+        print(f"{page:>10,} {offset_s * 1e3:>10.2f} {keyset_s * 1e3:>10.2f}")
+
+
+if __name__ == "__main__":
+    benchmark(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+    )
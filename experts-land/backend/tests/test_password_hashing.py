@@ -0,0 +1,130 @@
+"""Password hashing on the process pool, and the cache of recent verifications.
+
+Run as a script from experts-land/backend for the login throughput benchmark:
+
+    python tests/test_password_hashing.py [logins]
+"""
+import asyncio
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import security  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+@pytest.fixture
+def hashing(monkeypatch):
+    """security with a one-worker pool and a cache; counts the calls that reach the pool."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(settings, "PASSWORD_VERIFY_CACHE_TTL", 60)
+    # The semaphore belongs to an event loop; each test runs its own
+    monkeypatch.setattr(security, "_hash_slots", None)
+    monkeypatch.setattr(security, "_verified", OrderedDict())
+    calls = []
+    run_hash = security._run_hash
+
+    async def counting_run_hash(fn, *args):
+        calls.append(fn.__name__)
+        return await run_hash(fn, *args)
+
+    monkeypatch.setattr(security, "_run_hash", counting_run_hash)
+    yield calls
+    security.shutdown_hash_pool()
+
+
+def test_hash_and_verify_round_trip_through_the_pool(hashing):
+    async def scenario():
+        hashed = await security.aget_password_hash("correct horse")
+        return (
+            hashed,
+            await security.averify_password("correct horse", hashed),
+            await security.averify_password("wrong horse", hashed),
+        )
+
+    hashed, right, wrong = asyncio.run(scenario())
+    assert hashed.startswith("$2b$")
+    assert right is True and wrong is False
+    assert hashing == ["get_password_hash", "verify_password", "verify_password"]
+    assert security._hash_pool is not None
+
+
+def test_verification_is_cached_within_the_ttl(hashing):
+    hashed = security.get_password_hash("correct horse")
+
+    async def scenario():
+        return [await security.averify_password("correct horse", hashed) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [True, True, True]
+    assert hashing == ["verify_password"]
+
+
+def test_failed_verifications_are_not_cached(hashing):
+    hashed = security.get_password_hash("correct horse")
+
+    async def scenario():
+        return [await security.averify_password("wrong horse", hashed) for _ in range(2)]
+
+    assert asyncio.run(scenario()) == [False, False]
+    assert hashing == ["verify_password", "verify_password"]
+
+
+def test_changed_hash_misses_the_cache(hashing):
+    old = security.get_password_hash("correct horse")
+    new = security.get_password_hash("battery staple")
+
+    async def scenario():
+        return [
+            await security.averify_password("correct horse", old),
+            await security.averify_password("correct horse", new),
+            await security.averify_password("battery staple", new),
+        ]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+    assert hashing == ["verify_password"] * 3
+
+
+def test_cache_entries_expire(hashing, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_VERIFY_CACHE_TTL", 0.05)
+    hashed = security.get_password_hash("correct horse")
+
+    async def scenario():
+        await security.averify_password("correct horse", hashed)
+        await asyncio.sleep(0.1)
+        return await security.averify_password("correct horse", hashed)
+
+    assert asyncio.run(scenario()) is True
+    assert hashing == ["verify_password", "verify_password"]
+
+
+def benchmark(logins):
+    """Concurrent bcrypt verifications per second, for pools of 1..cpu_count workers."""
+    hashed = security.get_password_hash("correct horse")
+    settings.PASSWORD_VERIFY_CACHE_TTL = 0
+    print(f"{logins} concurrent logins, bcrypt cost {hashed.split('$')[2]}")
+    print(f"{'workers':>8} {'logins/s':>10} {'per worker':>11}")
+    for workers in sorted({1, 2, 4, os.cpu_count() or 1}):
+        if workers > (os.cpu_count() or 1):
+            continue
+        settings.PASSWORD_HASH_WORKERS = workers
+        security._hash_slots = None
+
+        async def run():
+            # Start the workers before timing
+            await asyncio.gather(*(security.averify_password("x", hashed) for _ in range(workers)))
+            started = time.perf_counter()
+            await asyncio.gather(*(security.averify_password("correct horse", hashed) for _ in range(logins)))
+            return time.perf_counter() - started
+
+        elapsed = asyncio.run(run())
+        security.shutdown_hash_pool()
+        print(f"{workers:>8} {logins / elapsed:>10.1f} {logins / elapsed / workers:>11.1f}")
+
+
+if __name__ == "__main__":
+    benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 64)
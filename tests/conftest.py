@@ -0,0 +1,30 @@
+import importlib
+import os
+
+import pytest
+
+os.environ.setdefault('Render', 'test')
+
+
+@pytest.fixture(scope="session")
+def app_home(tmp_path_factory):
+    """Working directory for app's conversation, survey and sheet stores."""
+    return tmp_path_factory.mktemp("app")
+
+
+@pytest.fixture(scope="session")
+def app_module(app_home):
+    # Importing app opens its stores in the working directory
+    cwd = os.getcwd()
+    os.chdir(app_home)
+    try:
+        return importlib.import_module("app")
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture
+def call_app(app_module, app_home, monkeypatch):
+    """app, with the working directory set for tests that run call turns (and write journals)."""
+    monkeypatch.chdir(app_home)
+    return app_module
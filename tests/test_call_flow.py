@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+REPLY = "Nice to meet you, John. Where do you live? Tell me a little about it."
+
+
+class FakeTranscriptions:
+    def __init__(self, text):
+        self.text = text
+
+    async def create(self, **kwargs):
+        return SimpleNamespace(text=self.text)
+
+
+class FakeCompletions:
+    """Chat completions that stream `reply` a word at a time, or return it whole."""
+
+    def __init__(self, reply):
+        self.reply = reply
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            return self._stream()
+        message = SimpleNamespace(content=self.reply)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    async def _stream(self):
+        for word in self.reply.split(" "):
+            await asyncio.sleep(0.01)
+            delta = SimpleNamespace(content=word + " ")
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+@pytest.fixture
+def streaming_app(call_app, monkeypatch):
+    def recordings(request):
+        return httpx.Response(200, content=b"audio")
+
+    monkeypatch.setattr(call_app, "STREAM_RESPONSES", True)
+    monkeypatch.setattr(call_app, "SPECULATIVE_MODE", False)
+    monkeypatch.setattr(call_app.reply_cache, "max_entries", 0)
+    monkeypatch.setattr(call_app, "recording_http", httpx.AsyncClient(transport=httpx.MockTransport(recordings)))
+    monkeypatch.setattr(call_app.client.audio, "transcriptions", FakeTranscriptions("My name is John"))
+    monkeypatch.setattr(call_app.client.chat, "completions", FakeCompletions(REPLY))
+    return call_app
+
+
+def test_streamed_reply_continues_and_records_next_answer(streaming_app):
+    client = streaming_app.app.test_client()
+    form = {'CallSid': 'CA-stream'}
+    client.post("/voice", data=form)
+
+    first = client.post("/handle-response?q=0", data=dict(form, RecordingUrl="https://api.example/Recordings/RE1"))
+    body = first.get_data(as_text=True)
+    assert "Nice to meet you, John." in body
+    assert "/continue-response?q=0" in body
+    assert "<Record" not in body
+
+    rest = client.post("/continue-response?q=0", data=form)
+    body = rest.get_data(as_text=True)
+    assert "Where do you live? Tell me a little about it." in body
+    assert 'action="/handle-response?q=1"' in body
+    assert "trouble" not in body
+
+    state = streaming_app.conversation_store.get('CA-stream')
+    assert state['first_name'] == "john"
+
+
+def test_continue_response_without_stream_records_answer(streaming_app):
+    client = streaming_app.app.test_client()
+    rest = client.post("/continue-response?q=3", data={'CallSid': 'CA-unknown'})
+    assert 'action="/handle-response?q=4"' in rest.get_data(as_text=True)
@@ -0,0 +1,27 @@
+import pytest
+
+
+def test_incomplete_store_fails_on_instantiation(app_module):
+    class NoAppend(app_module.ConversationStore):
+        def get(self, call_sid):
+            return None
+
+        def start(self, call_sid, conversation_log=(), **fields):
+            pass
+
+        def update(self, call_sid, **fields):
+            pass
+
+    with pytest.raises(TypeError, match="append"):
+        NoAppend()
+
+
+def test_in_memory_store_saves_a_turn_delta(app_module):
+    store = app_module.InMemoryConversationStore()
+    store.start('CA-delta', ["John: Hi"])
+    before = store.get('CA-delta')
+    after = dict(before, first_name="john", conversation_log=before['conversation_log'] + ["John: Boston"])
+    store.save_delta(before, after)
+    state = store.get('CA-delta')
+    assert state['first_name'] == "john"
+    assert state['conversation_log'] == ["John: Hi", "John: Boston"]
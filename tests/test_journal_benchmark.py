@@ -0,0 +1,95 @@
+"""Conversation persistence: the per-turn JSON snapshots app.py used to write, against
+the append-only turn journal (ConversationJournal) that replaced them.
+
+The test runs a small workload and checks the byte savings. For the full comparison,
+including per-turn latency, run it as a script from the repository root:
+
+    python tests/test_journal_benchmark.py [calls] [turns]
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+LINE = "John: I have been working as a nurse in Boston for about twelve years now."
+
+
+def snapshot_save(directory, call_sid, turn, conversation_data):
+    """The previous save_conversation: the whole call, re-written to a new file every turn."""
+    with open(os.path.join(directory, f"{call_sid}_{turn:04d}.json"), 'w') as f:
+        json.dump(conversation_data, f, indent=2)
+
+
+def directory_bytes(directory):
+    return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def run(app_module, calls, turns):
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        latencies = []
+        for call in range(calls):
+            call_sid = f"CA{call:06d}"
+            log = []
+            for turn in range(turns):
+                log.append(LINE)
+                data = {'call_sid': call_sid, 'conversation_log': log, 'first_name': "john",
+                        'preferred_name': None, 'timestamp': datetime.now().isoformat()}
+                started = time.perf_counter()
+                snapshot_save(directory, call_sid, turn, data)
+                latencies.append(time.perf_counter() - started)
+        results['snapshots'] = {'bytes': directory_bytes(directory), 'latencies': latencies}
+
+    with tempfile.TemporaryDirectory() as directory:
+        journal = app_module.ConversationJournal(directory)
+        latencies = []
+        for call in range(calls):
+            call_sid = f"CA{call:06d}"
+            for turn in range(turns):
+                entry = {'call_sid': call_sid, 'line': LINE, 'first_name': "john",
+                         'preferred_name': None, 'timestamp': datetime.now().isoformat()}
+                started = time.perf_counter()
+                journal.append(call_sid, entry)
+                latencies.append(time.perf_counter() - started)
+        journal.flush()
+        journal_bytes = directory_bytes(directory)
+        for call in range(calls):
+            journal.compact(f"CA{call:06d}")
+        journal.close()
+        # Compaction writes each call once more, as its final record
+        results['journal'] = {'bytes': journal_bytes + directory_bytes(directory), 'latencies': latencies}
+    return results
+
+
+def report(results, calls, turns):
+    print(f"{calls} calls x {turns} turns")
+    for name, result in results.items():
+        latencies = result['latencies']
+        print(f"  {name:9} {result['bytes'] / 1024:10.1f} KiB written   "
+              f"per turn: median {statistics.median(latencies) * 1e6:7.1f} us, "
+              f"p99 {percentile(latencies, 0.99) * 1e6:7.1f} us")
+
+
+def test_journal_writes_a_fraction_of_the_snapshot_bytes(app_module):
+    results = run(app_module, calls=5, turns=20)
+    report(results, 5, 20)
+    assert results['journal']['bytes'] * 3 < results['snapshots']['bytes']
+
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('Render', 'benchmark')
+    with tempfile.TemporaryDirectory() as home:
+        os.chdir(home)  # app opens its stores in the working directory on import
+        import app
+        calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+        turns = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+        report(run(app, calls, turns), calls, turns)
@@ -0,0 +1,49 @@
+import pytest
+
+
+@pytest.mark.parametrize("transcript, expected", [
+    # Intro phrases
+    ("My name is John", ("john", None)),
+    ("my name is John.", ("john", None)),
+    ("I'm Sarah", ("sarah", None)),
+    ("This is Dan calling", ("dan", None)),
+    ("I am Priya", ("priya", None)),
+    ("Hello, I'm Tom", ("tom", None)),
+    ("Hi I'm Mary-Jane", ("mary-jane", None)),
+    ("You can call me Al", ("al", None)),
+    ("Please call me Kate", ("kate", None)),
+    ("Everyone calls me Sunny", ("sunny", None)),
+    ("I go by Jay", ("jay", None)),
+    ("I prefer to be called Sam", ("sam", None)),
+    ("I like to be called Bea", ("bea", None)),
+    ("My friends call me Mo", ("mo", None)),
+    ("My nickname is Ace", ("ace", None)),
+    ("I'm known as Doc", ("doc", None)),
+    ("MY NAME IS O'BRIEN", ("o'brien", None)),
+    # The earliest intro phrase wins; the longest wins at the same position
+    ("This is Dan, my name is Daniel", ("dan", None)),
+    ("Hi I'm known as Doc", ("doc", None)),
+    # Preferred names
+    ("My name is Elizabeth, but call me Liz", ("elizabeth", "liz")),
+    ("My name is Elizabeth but you can call me Liz", ("elizabeth", "liz")),
+    ("I'm Robert, however everyone calls me Bob", ("robert", "bob")),
+    ("My name is William, but I go by Will", ("william", "will")),
+    ("This is Dan, but it's Danny", ("dan", "danny")),
+    ("My name is Katherine but Kat", ("katherine", "kat")),
+    # Words after an intro phrase that are not names
+    ("I am not sure, my name is Carl", ("carl", None)),
+    ("I'm good, my name is Bob", ("bob", None)),
+    ("My name is Ann, but I'm happy", ("ann", None)),
+    ("My name is Ann, but I'm happy, but call me Annie", ("ann", "annie")),
+    ("I'm Notley", ("notley", None)),
+    # No intro phrase: the first word, unless it cannot be a name
+    ("Sarah", ("sarah", None)),
+    ("Gary here", ("gary", None)),
+    ("I am not sure", ("there", None)),
+    ("um", ("there", None)),
+    ("", ("there", None)),
+    ("   ", ("there", None)),
+    ("...", ("there", None)),
+])
+def test_extract_name_and_preference(app_module, transcript, expected):
+    assert app_module.extract_name_and_preference(transcript) == expected
@@ -0,0 +1,111 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+URL = "https://api.twilio.example/2010-04-01/Accounts/AC1/Recordings/RE1.mp3"
+
+
+class RecordingServer:
+    """Stand-in for Twilio's recording endpoint: 404 for the first `not_ready` requests."""
+
+    def __init__(self, not_ready=0, body=b"audio", headers=None):
+        self.not_ready = not_ready
+        self.body = body
+        self.headers = headers or {}
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(time.monotonic())
+        if len(self.requests) <= self.not_ready:
+            return httpx.Response(404)
+        return httpx.Response(200, content=self.body, headers=self.headers)
+
+
+@pytest.fixture
+def serve(app_module, monkeypatch):
+    def serve(server):
+        transport = httpx.MockTransport(server)
+        monkeypatch.setattr(app_module, "recording_http", httpx.AsyncClient(transport=transport))
+        return server
+    return serve
+
+
+@pytest.fixture
+def backoff(app_module, monkeypatch):
+    def backoff(initial, maximum, timeout=5):
+        monkeypatch.setattr(app_module, "RECORDING_POLL_INITIAL_DELAY", initial)
+        monkeypatch.setattr(app_module, "RECORDING_POLL_MAX_DELAY", maximum)
+        monkeypatch.setattr(app_module, "RECORDING_READY_TIMEOUT", timeout)
+    return backoff
+
+
+def fetch(app_module, url=URL, recording_sid=None):
+    return app_module.run_async(app_module.fetch_recording(url, recording_sid), timeout=10)
+
+
+def test_first_request_goes_out_immediately(app_module, serve, backoff):
+    backoff(initial=1.0, maximum=1.0)
+    server = serve(RecordingServer())
+    started = time.monotonic()
+    audio = fetch(app_module)
+    assert audio.read() == b"audio"
+    assert audio.name == "recording.mp3"
+    assert server.requests[0] - started < 0.5
+
+
+def test_not_found_backs_off_exponentially(app_module, serve, backoff):
+    backoff(initial=0.05, maximum=0.2)
+    server = serve(RecordingServer(not_ready=4))
+    assert fetch(app_module).read() == b"audio"
+    gaps = [later - earlier for earlier, later in zip(server.requests, server.requests[1:])]
+    for gap, delay in zip(gaps, [0.05, 0.1, 0.2, 0.2]):
+        assert gap >= delay * 0.9
+
+
+def test_not_found_until_timeout_raises(app_module, serve, backoff):
+    backoff(initial=0.05, maximum=0.05, timeout=0.3)
+    serve(RecordingServer(not_ready=1000))
+    with pytest.raises(app_module.RecordingNotReady, match="status 404"):
+        fetch(app_module)
+
+
+def test_recording_callback_cuts_the_backoff_short(app_module, serve, backoff):
+    backoff(initial=5.0, maximum=5.0)
+    server = serve(RecordingServer(not_ready=1))
+    # The callback only knows the bare sid; the sid is read from the .mp3 URL
+    threading.Timer(0.2, app_module.recording_registry.mark_ready, args=("RE1",)).start()
+    started = time.monotonic()
+    assert fetch(app_module).read() == b"audio"
+    assert time.monotonic() - started < 2
+    assert len(server.requests) == 2
+
+
+def test_recording_sid_from_url_drops_the_extension(app_module):
+    assert app_module.recording_sid_from_url(URL) == "RE1"
+    assert app_module.recording_sid_from_url(URL[:-len(".mp3")]) == "RE1"
+
+
+def test_oversized_recording_is_rejected_by_content_length(app_module, serve, backoff, monkeypatch):
+    backoff(initial=0.05, maximum=0.05)
+    monkeypatch.setattr(app_module, "MAX_RECORDING_BYTES", 10)
+    serve(RecordingServer(body=b"x" * 11))
+    with pytest.raises(app_module.RecordingTooLarge):
+        fetch(app_module)
+
+
+def test_oversized_recording_is_rejected_while_streaming(app_module, serve, backoff, monkeypatch):
+    backoff(initial=0.05, maximum=0.05)
+    monkeypatch.setattr(app_module, "MAX_RECORDING_BYTES", 10)
+
+    async def chunks():
+        for _ in range(4):
+            yield b"x" * 4
+
+    def server(request):
+        return httpx.Response(200, content=chunks())
+
+    serve(server)
+    with pytest.raises(app_module.RecordingTooLarge, match="exceeds"):
+        fetch(app_module)